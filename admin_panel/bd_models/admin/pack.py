@@ -1,7 +1,14 @@
+from typing import TYPE_CHECKING
+
 from django.contrib import admin
 from django.utils.safestring import mark_safe
 
 from ..models import Pack, PackOpenHistory, PlayerPack
+from ..utils import ApproxCountPaginator
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+    from django.http import HttpRequest
 
 
 @admin.register(Pack)
@@ -73,6 +80,9 @@ class PackAdmin(admin.ModelAdmin):
     ]
     autocomplete_fields = ["special"]
 
+    def get_queryset(self, request: "HttpRequest") -> "QuerySet[Pack]":
+        return super().get_queryset(request).select_related("special")
+
     @admin.display(description="Emoji")
     def emoji_display(self, obj: Pack) -> str:
         return obj.emoji or "-"
@@ -85,6 +95,7 @@ class PackAdmin(admin.ModelAdmin):
 @admin.register(PlayerPack)
 class PlayerPackAdmin(admin.ModelAdmin):
     list_display = ["player", "pack", "quantity"]
+    list_select_related = ["player", "pack"]
     list_filter = ["pack"]
     search_fields = ["player__discord_id"]
     autocomplete_fields = ["player", "pack"]
@@ -93,9 +104,12 @@ class PlayerPackAdmin(admin.ModelAdmin):
 @admin.register(PackOpenHistory)
 class PackOpenHistoryAdmin(admin.ModelAdmin):
     list_display = ["player", "pack", "opened_at", "cards_received"]
+    list_select_related = ["player", "pack"]
     list_filter = ["pack", "opened_at"]
     search_fields = ["player__discord_id"]
     ordering = ["-opened_at"]
+    show_full_result_count = False
+    paginator = ApproxCountPaginator
     readonly_fields = ["player", "pack", "opened_at", "cards_received"]
     
     def has_add_permission(self, request):
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-15 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bd_models", "0009_ballinstance_deleted_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ballinstance",
+            index=models.Index(
+                condition=models.Q(("deleted", False), ("favorite", False), ("tradeable", True)),
+                fields=["player"],
+                name="ballinstance_sellable_idx",
+            ),
+        ),
+    ]
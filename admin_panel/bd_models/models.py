@@ -334,7 +334,14 @@ class BallInstance(models.Model):
         db_table = "ballinstance"
         unique_together = (("player", "id"),)
         verbose_name = f"{settings.collectible_name} instance"
-        indexes = [models.Index(fields=("deleted",))]
+        indexes = [
+            models.Index(fields=("deleted",)),
+            models.Index(
+                fields=("player",),
+                condition=models.Q(deleted=False, favorite=False, tradeable=True),
+                name="ballinstance_sellable_idx",
+            ),
+        ]
 
 
 class BlacklistedID(models.Model):
@@ -471,6 +478,7 @@ class PlayerPack(models.Model):
         managed = True
         db_table = "playerpack"
         unique_together = (("player", "pack"),)
+        indexes = [models.Index(fields=("player", "quantity"))]
 
 
 class PackOpenHistory(models.Model):
@@ -487,3 +495,8 @@ class PackOpenHistory(models.Model):
     class Meta:
         managed = True
         db_table = "packopenhistory"
+        indexes = [
+            models.Index(fields=("-opened_at",)),
+            models.Index(fields=("pack", "-opened_at")),
+            models.Index(fields=("player", "pack", "-opened_at")),
+        ]
@@ -250,6 +250,11 @@ class BallInstance(models.Model):
             PostgreSQLIndex(fields=("ball_id",)),
             PostgreSQLIndex(fields=("player_id",)),
             PostgreSQLIndex(fields=("special_id",)),
+            PostgreSQLIndex(
+                fields=("player_id",),
+                name="ballinstance_sellable_idx",
+                condition={"deleted": False, "favorite": False, "tradeable": True},
+            ),
         ]
         manager = BallInstanceManager()
 
@@ -704,6 +709,8 @@ class Pack(models.Model):
 
 class PlayerPack(models.Model):
     id: int
+    player_id: int
+    pack_id: int
     player: fields.ForeignKeyRelation[Player] = fields.ForeignKeyField(
         "models.Player", related_name="playerpacks", on_delete=fields.CASCADE
     )
@@ -721,6 +728,7 @@ class PlayerPack(models.Model):
         indexes = [
             PostgreSQLIndex(fields=("player_id",)),
             PostgreSQLIndex(fields=("pack_id",)),
+            PostgreSQLIndex(fields=("player_id", "quantity")),
         ]
 
 
@@ -744,4 +752,6 @@ class PackOpenHistory(models.Model):
             PostgreSQLIndex(fields=("player_id",)),
             PostgreSQLIndex(fields=("pack_id",)),
             PostgreSQLIndex(fields=("opened_at",)),
+            PostgreSQLIndex(fields=("pack_id", "opened_at")),
+            PostgreSQLIndex(fields=("player_id", "pack_id", "opened_at")),
         ]
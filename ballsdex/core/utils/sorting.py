@@ -31,7 +31,7 @@ class SortingChoices(enum.Enum):
 
 
 def sort_balls(
-    sort: SortingChoices, queryset: "QuerySet[BallInstance]"
+    sort: SortingChoices, queryset: "QuerySet[BallInstance]", tiebreaker: str | None = None
 ) -> "QuerySet[BallInstance]":
     """
     Edit a queryset in place to apply the selected sorting options. You can call this function
@@ -45,26 +45,30 @@ def sort_balls(
         An existing queryset of ball instances. This can be obtained with, for example,
         ``BallInstance.all()`` or ``BallInstance.filter(player=x)``
         **without awaiting the result!**
+    tiebreaker: str | None
+        A field appended as the last sort key, to get a deterministic order between instances
+        that compare equal (needed when paginating with offsets). Ignored if not provided.
 
     Returns
     -------
     QuerySet[BallInstance]
         The same queryset modified to apply the ordering. Await it to obtain the result.
     """
+    extra = (tiebreaker,) if tiebreaker else ()
     if sort == SortingChoices.duplicates:
         return queryset.annotate(count=RawSQL("COUNT(*) OVER (PARTITION BY ball_id)")).order_by(
-            "-count"
+            "-count", *extra
         )
     elif sort == SortingChoices.stats_bonus:
         return queryset.annotate(stats_bonus=F("health_bonus") + F("attack_bonus")).order_by(
-            "-stats_bonus"
+            "-stats_bonus", *extra
         )
     elif sort == SortingChoices.health or sort == SortingChoices.attack:
         # Use the sorting name as the annotation key to avoid issues when this function
         # is called multiple times. Using the same annotation name twice will error.
         return queryset.annotate(
             **{f"{sort.value}_sort": F(f"{sort.value}_bonus") + F(f"ball__{sort.value}")}
-        ).order_by(f"-{sort.value}_sort")
+        ).order_by(f"-{sort.value}_sort", *extra)
     # elif sort == SortingChoices.total_stats:
     #     return (
     #         queryset.select_related("ball")
@@ -74,9 +78,9 @@ def sort_balls(
     #         .order_by("-stats")
     #     )
     elif sort == SortingChoices.rarity:
-        return queryset.order_by(sort.value, "ball__country")
+        return queryset.order_by(sort.value, "ball__country", *extra)
     else:
-        return queryset.order_by(sort.value)
+        return queryset.order_by(sort.value, *extra)
 
 
 def filter_balls(
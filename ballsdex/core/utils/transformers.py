@@ -159,7 +159,7 @@ class BallInstanceTransformer(ModelTransformer[BallInstance]):
     base = 16
 
     async def get_from_pk(self, value: int) -> BallInstance:
-        return await self.model.get(pk=value).prefetch_related("player")
+        return await self.model.get(pk=value).select_related("ball", "special", "player")
 
     async def validate(self, interaction: discord.Interaction["BallsDexBot"], item: BallInstance):
         # checking if the ball does belong to user, and a custom ID wasn't forced
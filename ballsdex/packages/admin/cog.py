@@ -1,3 +1,4 @@
+import asyncio
 from collections import defaultdict
 from typing import TYPE_CHECKING, cast
 
@@ -15,6 +16,7 @@ from .blacklist import Blacklist as BlacklistGroup
 from .blacklist import BlacklistGuild as BlacklistGuildGroup
 from .coins import CoinsAdmin as CoinsGroup
 from .coins import PacksAdmin as PacksGroup
+from .coins import log_worker
 from .history import History as HistoryGroup
 from .info import Info as InfoGroup
 from .logs import Logs as LogsGroup
@@ -46,6 +48,19 @@ class Admin(commands.GroupCog):
         self.__cog_app_commands_group__.add_command(HistoryGroup())
         self.__cog_app_commands_group__.add_command(LogsGroup())
         self.__cog_app_commands_group__.add_command(InfoGroup())
+        self.log_task: asyncio.Task | None = None
+
+    async def cog_load(self):
+        self.log_task = self.bot.loop.create_task(log_worker(self.bot))
+
+    async def cog_unload(self):
+        if self.log_task:
+            # the worker flushes the queued logs when cancelled, wait for it
+            self.log_task.cancel()
+            try:
+                await self.log_task
+            except asyncio.CancelledError:
+                pass
 
     @app_commands.command()
     @app_commands.checks.has_any_role(*settings.root_role_ids)
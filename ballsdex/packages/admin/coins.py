@@ -1,9 +1,12 @@
+import asyncio
+import enum
 import logging
 from typing import TYPE_CHECKING
 
 import discord
+from cachetools import TTLCache
 from discord import app_commands
-from tortoise.transactions import in_transaction
+from tortoise import Tortoise
 
 from ballsdex.core.models import Pack, Player, PlayerPack
 from ballsdex.core.utils.logging import log_action
@@ -14,12 +17,126 @@ if TYPE_CHECKING:
 
 log = logging.getLogger("ballsdex.packages.admin.coins")
 
+# admin actions are sent to the log channel in batches by a single background worker,
+# started when the admin cog loads
+_log_queue: asyncio.Queue[str] = asyncio.Queue()
+LOG_BATCH_SIZE = 10
+LOG_BATCH_DELAY = 0.25
+
+
+async def _send_logs(bot: "BallsDexBot", messages: list[str]):
+    # discord messages are limited to 2000 characters, newline separators included
+    batches: list[str] = []
+    for message in messages:
+        if batches and len(batches[-1]) + 1 + len(message) <= 2000:
+            batches[-1] += "\n" + message
+        else:
+            batches.append(message)
+    for batch in batches:
+        try:
+            await log_action(batch, bot)
+        except Exception:
+            log.exception("Failed to send admin coins logs")
+
+
+async def log_worker(bot: "BallsDexBot"):
+    loop = asyncio.get_running_loop()
+    messages: list[str] = []
+    try:
+        while True:
+            messages = [await _log_queue.get()]
+            deadline = loop.time() + LOG_BATCH_DELAY
+            while len(messages) < LOG_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    messages.append(await asyncio.wait_for(_log_queue.get(), timeout))
+                except TimeoutError:
+                    break
+            # cleared before sending, a cancellation mid-send must not send the batch again
+            batch, messages = messages, []
+            await _send_logs(bot, batch)
+    except asyncio.CancelledError:
+        # the cog is unloading, flush what is left before stopping
+        while not _log_queue.empty():
+            messages.append(_log_queue.get_nowait())
+        await _send_logs(bot, messages)
+        raise
+
+
+# lightweight (id, name, emoji) rows used for autocompletion, keyed by search term
+_pack_cache: TTLCache[str, list[dict]] = TTLCache(maxsize=512, ttl=60)
+
+
+async def _search_packs(current: str) -> list[dict]:
+    current = current.lower()
+    packs = _pack_cache.get(current)
+    if packs is None:
+        packs = (
+            await Pack.filter(name__icontains=current)
+            .order_by("name")
+            .limit(25)
+            .values("id", "name", "emoji")
+        )
+        _pack_cache[current] = packs
+    return packs
+
+
+class CoinsUpdate(enum.Enum):
+    """
+    How ``_update_coins`` changes a balance, each member maps to a fixed statement.
+    """
+
+    add = enum.auto()
+    remove = enum.auto()
+    set = enum.auto()
+
+
+_COINS_UPDATE_FROM = (
+    "FROM (SELECT id, coins FROM player WHERE discord_id = $1 FOR UPDATE) AS old "
+    "WHERE player.id = old.id RETURNING old.coins AS old_coins, player.coins AS new_coins"
+)
+_COINS_UPDATE_QUERIES: dict[CoinsUpdate, str] = {
+    CoinsUpdate.add: "UPDATE player SET coins = old.coins + $2 " + _COINS_UPDATE_FROM,
+    CoinsUpdate.remove: "UPDATE player SET coins = GREATEST(old.coins - $2, 0) "
+    + _COINS_UPDATE_FROM,
+    CoinsUpdate.set: "UPDATE player SET coins = $2 " + _COINS_UPDATE_FROM,
+}
+
+
+async def _update_coins(discord_id: int, update: CoinsUpdate, amount: int) -> tuple[int, int]:
+    """
+    Update a player's coin balance with a single atomic query.
+
+    Parameters
+    ----------
+    discord_id: int
+        Discord ID of the player. The player is created if it doesn't exist.
+    update: CoinsUpdate
+        Whether ``amount`` is added to, removed from (down to 0) or replaces the balance.
+    amount: int
+        The amount of coins.
+
+    Returns
+    -------
+    tuple[int, int]
+        The balance before and after the update.
+    """
+    connection = Tortoise.get_connection("default")
+    query = _COINS_UPDATE_QUERIES[update]
+    rows = await connection.execute_query_dict(query, [discord_id, amount])
+    if not rows:
+        # first time we see this player, create the row with its defaults then apply the update
+        await Player.get_or_create(discord_id=discord_id)
+        rows = await connection.execute_query_dict(query, [discord_id, amount])
+    return rows[0]["old_coins"], rows[0]["new_coins"]
+
 
 class PackTransform(app_commands.Transformer):
     async def transform(self, interaction: discord.Interaction, value: str) -> Pack:
-        try:
-            pack = await Pack.get(id=int(value))
-        except Exception:
+        pack = await Pack.get_or_none(id=int(value)) if value.isdigit() else None
+        if not pack:
             pack = await Pack.filter(name__icontains=value).first()
         if not pack:
             raise app_commands.TransformerError(value, type(value), self)
@@ -28,16 +145,14 @@ class PackTransform(app_commands.Transformer):
     async def autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
-        packs = await Pack.all().order_by("name")
         choices = []
-        for pack in packs:
-            if current.lower() in pack.name.lower():
-                emoji = pack.emoji + " " if pack.emoji else ""
-                choices.append(app_commands.Choice(
-                    name=f"{emoji}{pack.name}",
-                    value=str(pack.id)
-                ))
-        return choices[:25]
+        for pack in await _search_packs(current):
+            emoji = pack["emoji"] + " " if pack["emoji"] else ""
+            choices.append(app_commands.Choice(
+                name=f"{emoji}{pack['name']}",
+                value=str(pack["id"])
+            ))
+        return choices
 
 
 class CoinsAdmin(app_commands.Group):
@@ -67,21 +182,17 @@ class CoinsAdmin(app_commands.Group):
             await interaction.response.send_message("Amount must be positive!", ephemeral=True)
             return
 
-        player, _ = await Player.get_or_create(discord_id=user.id)
-        old_balance = player.coins
-        player.coins += amount
-        await player.save(update_fields=["coins"])
+        old_balance, new_balance = await _update_coins(user.id, CoinsUpdate.add, amount)
 
         await interaction.response.send_message(
             f"Added **{amount:,}** coins to {user.mention}.\n"
-            f"Balance: {old_balance:,} -> **{player.coins:,}** coins",
+            f"Balance: {old_balance:,} -> **{new_balance:,}** coins",
             ephemeral=True
         )
         
-        await log_action(
+        _log_queue.put_nowait(
             f"{interaction.user} added {amount:,} coins to {user} (ID: {user.id}). "
-            f"New balance: {player.coins:,}",
-            interaction.client,
+            f"New balance: {new_balance:,}",
         )
 
     @app_commands.command()
@@ -106,21 +217,17 @@ class CoinsAdmin(app_commands.Group):
             await interaction.response.send_message("Amount must be positive!", ephemeral=True)
             return
 
-        player, _ = await Player.get_or_create(discord_id=user.id)
-        old_balance = player.coins
-        player.coins = max(0, player.coins - amount)
-        await player.save(update_fields=["coins"])
+        old_balance, new_balance = await _update_coins(user.id, CoinsUpdate.remove, amount)
 
         await interaction.response.send_message(
             f"Removed **{amount:,}** coins from {user.mention}.\n"
-            f"Balance: {old_balance:,} -> **{player.coins:,}** coins",
+            f"Balance: {old_balance:,} -> **{new_balance:,}** coins",
             ephemeral=True
         )
         
-        await log_action(
+        _log_queue.put_nowait(
             f"{interaction.user} removed {amount:,} coins from {user} (ID: {user.id}). "
-            f"New balance: {player.coins:,}",
-            interaction.client,
+            f"New balance: {new_balance:,}",
         )
 
     @app_commands.command()
@@ -145,21 +252,17 @@ class CoinsAdmin(app_commands.Group):
             await interaction.response.send_message("Amount cannot be negative!", ephemeral=True)
             return
 
-        player, _ = await Player.get_or_create(discord_id=user.id)
-        old_balance = player.coins
-        player.coins = amount
-        await player.save(update_fields=["coins"])
+        old_balance, new_balance = await _update_coins(user.id, CoinsUpdate.set, amount)
 
         await interaction.response.send_message(
             f"Set {user.mention}'s coins to **{amount:,}**.\n"
-            f"Balance: {old_balance:,} -> **{player.coins:,}** coins",
+            f"Balance: {old_balance:,} -> **{new_balance:,}** coins",
             ephemeral=True
         )
         
-        await log_action(
+        _log_queue.put_nowait(
             f"{interaction.user} set {user}'s (ID: {user.id}) coins to {amount:,}. "
             f"Previous balance: {old_balance:,}",
-            interaction.client,
         )
 
     @app_commands.command()
@@ -215,33 +318,28 @@ class PacksAdmin(app_commands.Group):
             await interaction.response.send_message("Amount must be positive!", ephemeral=True)
             return
 
-        async with in_transaction():
-            player, _ = await Player.get_or_create(discord_id=user.id)
-            
-            player_pack = await PlayerPack.filter(player=player, pack=pack).first()
-            if player_pack:
-                old_quantity = player_pack.quantity
-                player_pack.quantity += amount
-                await player_pack.save(update_fields=["quantity"])
-            else:
-                old_quantity = 0
-                player_pack = await PlayerPack.create(
-                    player=player,
-                    pack=pack,
-                    quantity=amount
-                )
+        player, _ = await Player.get_or_create(discord_id=user.id)
+        connection = Tortoise.get_connection("default")
+        rows = await connection.execute_query_dict(
+            "INSERT INTO playerpack (player_id, pack_id, quantity) VALUES ($1, $2, $3) "
+            "ON CONFLICT (player_id, pack_id) "
+            "DO UPDATE SET quantity = playerpack.quantity + EXCLUDED.quantity "
+            "RETURNING quantity",
+            [player.pk, pack.pk, amount],
+        )
+        new_quantity: int = rows[0]["quantity"]
+        old_quantity = new_quantity - amount
 
         emoji = pack.emoji + " " if pack.emoji else ""
         await interaction.response.send_message(
             f"Added **{amount}x {emoji}{pack.name}** to {user.mention}.\n"
-            f"Pack count: {old_quantity} -> **{player_pack.quantity}**",
+            f"Pack count: {old_quantity} -> **{new_quantity}**",
             ephemeral=True
         )
         
-        await log_action(
+        _log_queue.put_nowait(
             f"{interaction.user} added {amount}x {pack.name} to {user} (ID: {user.id}). "
-            f"New count: {player_pack.quantity}",
-            interaction.client,
+            f"New count: {new_quantity}",
         )
 
     @app_commands.command()
@@ -290,10 +388,9 @@ class PacksAdmin(app_commands.Group):
             ephemeral=True
         )
         
-        await log_action(
+        _log_queue.put_nowait(
             f"{interaction.user} removed {amount}x {pack.name} from {user} (ID: {user.id}). "
             f"New count: {player_pack.quantity}",
-            interaction.client,
         )
 
     @app_commands.command()
@@ -312,7 +409,9 @@ class PacksAdmin(app_commands.Group):
             The user to check packs for
         """
         player, _ = await Player.get_or_create(discord_id=user.id)
-        player_packs = await PlayerPack.filter(player=player, quantity__gt=0).prefetch_related("pack")
+        player_packs = await PlayerPack.filter(player=player, quantity__gt=0).select_related(
+            "pack"
+        )
 
         if not player_packs:
             await interaction.response.send_message(
@@ -321,10 +420,10 @@ class PacksAdmin(app_commands.Group):
             )
             return
 
-        pack_list = ""
-        for pp in player_packs:
-            emoji = pp.pack.emoji + " " if pp.pack.emoji else ""
-            pack_list += f"{emoji}**{pp.pack.name}**: {pp.quantity}\n"
+        pack_list = "\n".join(
+            f"{pp.pack.emoji + ' ' if pp.pack.emoji else ''}**{pp.pack.name}**: {pp.quantity}"
+            for pp in player_packs
+        )
 
         await interaction.response.send_message(
             f"**{user.display_name}'s Packs:**\n{pack_list}",
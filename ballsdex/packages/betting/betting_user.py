@@ -12,7 +12,31 @@ class BettingUser:
     def __init__(self, user: discord.User | discord.Member, player: "Player"):
         self.user = user
         self.player = player
+        # instances are loaded with their ball, special and player relations joined, so that
+        # rendering the proposal never triggers lazy queries
         self.proposal: list["BallInstance"] = []
+        self.proposal_ids: set[int] = set()
+        # incremented on every change of the proposal, used to invalidate rendering caches
+        self.proposal_version = 0
+        self._rendered_cache: tuple[tuple, list[str]] | None = None
+        # (ball instance ID, short) -> rendered description, dropped with the bet
+        self._description_cache: dict[tuple[int, bool], str] = {}
         self.locked = False
         self.accepted = False
         self.cancelled = False
+
+    def add_to_proposal(self, *balls: "BallInstance"):
+        for ball in balls:
+            self.proposal.append(ball)
+            self.proposal_ids.add(ball.pk)
+        self.proposal_version += 1
+
+    def remove_from_proposal(self, ball: "BallInstance"):
+        self.proposal_ids.discard(ball.pk)
+        self.proposal = [x for x in self.proposal if x.pk != ball.pk]
+        self.proposal_version += 1
+
+    def clear_proposal(self):
+        self.proposal.clear()
+        self.proposal_ids.clear()
+        self.proposal_version += 1
@@ -1,6 +1,7 @@
+import asyncio
 import datetime
+import functools
 import logging
-from collections import defaultdict
 from typing import TYPE_CHECKING, Optional
 
 import discord
@@ -20,19 +21,23 @@ from ballsdex.core.utils.transformers import (
 )
 from ballsdex.packages.betting.betting_user import BettingUser
 from ballsdex.packages.betting.menu import BetMenu
+from ballsdex.settings import settings
 
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
 
 log = logging.getLogger("ballsdex.packages.betting")
 
-BETTING_GUILD_ID = 1440962506796433519
-BETTING_CHANNEL_ID = 1443544409684836382
+_BETTING_CHANNELS: frozenset[tuple[int, int]] = frozenset(
+    (guild_id, channel_id) for guild_id, channel_id in settings.betting_channels
+)
 
 
 def betting_channel_check(interaction: discord.Interaction) -> bool:
-    """Check if user is in betting channel"""
-    return interaction.guild_id == BETTING_GUILD_ID and interaction.channel_id == BETTING_CHANNEL_ID
+    """Check if user is in betting channel, any channel is allowed if none is configured"""
+    if not _BETTING_CHANNELS:
+        return True
+    return (interaction.guild_id, interaction.channel_id) in _BETTING_CHANNELS
 
 
 @app_commands.guild_only()
@@ -43,7 +48,17 @@ class Bet(commands.GroupCog):
 
     def __init__(self, bot: "BallsDexBot"):
         self.bot = bot
-        self.bets: TTLCache[int, dict[int, list[BetMenu]]] = TTLCache(maxsize=999999, ttl=1800)
+        self.bets: TTLCache[tuple[int, int], list[BetMenu]] = TTLCache(maxsize=999999, ttl=1800)
+        # (guild_id, channel_id, user_id) -> bet, avoids scanning every bet of the channel
+        self._by_user: TTLCache[tuple[int, int, int], BetMenu] = TTLCache(
+            maxsize=999999, ttl=1800
+        )
+
+    @staticmethod
+    def _is_over(bet: BetMenu) -> bool:
+        # user cancellations go through BetMenu.cancel which flips the flag, the view check is
+        # only kept as a fallback for views that stopped on their own
+        return bet._dead or bet.current_view.is_finished()
 
     def get_bet(
         self,
@@ -63,34 +78,34 @@ class Bet(commands.GroupCog):
         else:
             raise TypeError("Missing interaction or channel")
 
-        if guild.id not in self.bets:
-            self.bets[guild.id] = defaultdict(list)
-        if channel.id not in self.bets[guild.id]:
+        key = (guild.id, channel.id, user.id)
+        menu = self._by_user.get(key)
+        if menu is not None:
+            if not self._is_over(menu):
+                return (menu, menu._get_bettor(user))
+            self._by_user.pop(key, None)
+
+        bets = self.bets.get((guild.id, channel.id))
+        if not bets:
             return (None, None)
-        
-        to_remove: list[BetMenu] = []
-        for bet in self.bets[guild.id][channel.id]:
-            if (
-                bet.current_view.is_finished()
-                or bet.bettor1.cancelled
-                or bet.bettor2.cancelled
-            ):
-                to_remove.append(bet)
+
+        to_remove: set[BetMenu] = set()
+        result: tuple[BetMenu, BettingUser] | tuple[None, None] = (None, None)
+        for bet in bets:
+            if self._is_over(bet):
+                to_remove.add(bet)
                 continue
             try:
                 bettor = bet._get_bettor(user)
             except RuntimeError:
                 continue
             else:
+                result = (bet, bettor)
                 break
-        else:
-            for bet in to_remove:
-                self.bets[guild.id][channel.id].remove(bet)
-            return (None, None)
 
-        for bet in to_remove:
-            self.bets[guild.id][channel.id].remove(bet)
-        return (bet, bettor)
+        if to_remove:
+            self.bets[(guild.id, channel.id)] = [x for x in bets if x not in to_remove]
+        return result
 
     @app_commands.command()
     @app_commands.check(betting_channel_check)
@@ -112,8 +127,10 @@ class Bet(commands.GroupCog):
             )
             return
 
-        player1, _ = await Player.get_or_create(discord_id=interaction.user.id)
-        player2, _ = await Player.get_or_create(discord_id=user.id)
+        (player1, _), (player2, _) = await asyncio.gather(
+            Player.get_or_create(discord_id=interaction.user.id),
+            Player.get_or_create(discord_id=user.id),
+        )
 
         bet1, bettor1 = self.get_bet(interaction)
         bet2, bettor2 = self.get_bet(channel=interaction.channel, user=user)  # type: ignore
@@ -131,7 +148,10 @@ class Bet(commands.GroupCog):
         menu = BetMenu(
             self, interaction, BettingUser(interaction.user, player1), BettingUser(user, player2)
         )
-        self.bets[interaction.guild.id][interaction.channel.id].append(menu)  # type: ignore
+        guild_id, channel_id = interaction.guild.id, interaction.channel.id  # type: ignore
+        self.bets.setdefault((guild_id, channel_id), []).append(menu)
+        self._by_user[(guild_id, channel_id, interaction.user.id)] = menu
+        self._by_user[(guild_id, channel_id, user.id)] = menu
         await menu.start()
         await interaction.response.send_message("Bet started!", ephemeral=True)
 
@@ -155,26 +175,31 @@ class Bet(commands.GroupCog):
         """
         if not nba:
             return
-        await interaction.response.defer(ephemeral=True, thinking=True)
-        
+
+        # those checks are all in memory, reply right away without deferring
         bet, bettor = self.get_bet(interaction)
         if not bet or not bettor:
-            await interaction.followup.send("You do not have an ongoing bet.", ephemeral=True)
+            await interaction.response.send_message(
+                "You do not have an ongoing bet.", ephemeral=True
+            )
             return
-        
+
         if bettor.locked:
-            await interaction.followup.send(
+            await interaction.response.send_message(
                 "You have locked your proposal, it cannot be edited! "
                 "You can click the cancel button to stop the bet instead.",
                 ephemeral=True,
             )
             return
-        
-        if nba in bettor.proposal:
-            await interaction.followup.send("You already have this NBA in your proposal.", ephemeral=True)
+
+        if nba.pk in bettor.proposal_ids:
+            await interaction.response.send_message(
+                "You already have this NBA in your proposal.", ephemeral=True
+            )
             return
 
         if nba.favorite:
+            await interaction.response.defer(ephemeral=True, thinking=True)
             view = ConfirmChoiceView(
                 interaction,
                 accept_message="NBA added.",
@@ -189,8 +214,12 @@ class Bet(commands.GroupCog):
             if not view.value:
                 return
 
-        bettor.proposal.append(nba)
-        await interaction.followup.send("NBA added to your proposal.", ephemeral=True)
+        bettor.add_to_proposal(nba)
+        bet.mark_dirty()
+        if interaction.response.is_done():
+            await interaction.followup.send("NBA added to your proposal.", ephemeral=True)
+        else:
+            await interaction.response.send_message("NBA added to your proposal.", ephemeral=True)
 
     @app_commands.command()
     @app_commands.check(betting_channel_check)
@@ -228,8 +257,9 @@ class Bet(commands.GroupCog):
             )
             return
         
-        if nba in bettor.proposal:
-            bettor.proposal.remove(nba)
+        if nba.pk in bettor.proposal_ids:
+            bettor.remove_from_proposal(nba)
+            bet.mark_dirty()
             await interaction.followup.send("NBA removed from your proposal.", ephemeral=True)
         else:
             await interaction.followup.send("NBA not found in your proposal.", ephemeral=True)
@@ -253,8 +283,14 @@ class Bet(commands.GroupCog):
         )
 
         if bettor.proposal:
-            lines = [f"- {nba.description(short=True, include_emoji=True, bot=self.bot, is_trade=True)}" for nba in bettor.proposal]
-            embed.description = "\n".join(lines)
+            fmt = functools.partial(
+                BallInstance.description,
+                short=True,
+                include_emoji=True,
+                bot=self.bot,
+                is_trade=True,
+            )
+            embed.description = "\n".join(f"- {fmt(nba)}" for nba in bettor.proposal)
         else:
             embed.description = "*Empty*"
 
@@ -315,19 +351,28 @@ class Bet(commands.GroupCog):
             if filter:
                 query = filter_balls(filter, query, interaction.guild_id)
 
-            ball_ids = await query.values_list("id", flat=True)
+            # one more than the cap to know if results were cut
+            ball_ids = await query.limit(BallsSelector.MAX_BALLS + 1).values_list("id", flat=True)
             if not ball_ids:
                 await interaction.followup.send(
                     "No NBAs found matching your criteria.", ephemeral=True
                 )
                 return
 
-            view = BallsSelector(interaction, ball_ids, self)
-            await view.start(
-                content="Select the NBAs you want to add to your proposal. "
+            content = (
+                "Select the NBAs you want to add to your proposal. "
                 "Note that the display will wipe on pagination however "
                 "the selected NBAs will remain."
             )
+            if len(ball_ids) > BallsSelector.MAX_BALLS:
+                ball_ids = ball_ids[: BallsSelector.MAX_BALLS]
+                content += (
+                    f"\nOnly the first {BallsSelector.MAX_BALLS} matching NBAs are listed, "
+                    "use the filters to narrow down the results."
+                )
+
+            view = BallsSelector(interaction, ball_ids, self)
+            await view.start(content=content)
         except Exception as e:
             await interaction.followup.send(f"Error: {str(e)}", ephemeral=True)
             log.error(f"Error bulk adding NBAs: {e}", exc_info=True)
@@ -1,14 +1,16 @@
 from typing import TYPE_CHECKING, Iterable
 
 import discord
+from discord.utils import format_dt
 
-from ballsdex.core.models import BetHistory
+from ballsdex.core.models import BetHistory, Player
 from ballsdex.core.utils import menus
 from ballsdex.core.utils.paginator import Pages
 from ballsdex.packages.betting.betting_user import BettingUser
 
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
+    from ballsdex.core.models import BallInstance
 
 
 def _get_prefix_emote(bettor: BettingUser) -> str:
@@ -26,27 +28,46 @@ def _get_bettor_name(bettor: BettingUser) -> str:
     return f"{_get_prefix_emote(bettor)} {bettor.user.name}"
 
 
+def _describe(bettor: BettingUser, nba: "BallInstance", bot: "BallsDexBot", short: bool) -> str:
+    # instances can't change while they are part of a bet, their description is stable until
+    # the bet ends, along with the bettor holding the cache
+    key = (nba.pk, short)
+    text = bettor._description_cache.get(key)
+    if text is None:
+        text = nba.description(short=short, include_emoji=True, bot=bot, is_trade=True)
+        bettor._description_cache[key] = text
+    return text
+
+
 def _build_list_of_strings(bettor: BettingUser, bot: "BallsDexBot", short: bool = False) -> list[str]:
-    proposal: list[str] = [""]
-    i = 0
+    # the output only depends on the proposal and the bettor's state, reuse the last render
+    signature = (bettor.proposal_version, bettor.locked, bettor.cancelled, short)
+    if bettor._rendered_cache and bettor._rendered_cache[0] == signature:
+        return bettor._rendered_cache[1]
+
+    # fragments are joined once per field instead of growing a string on every iteration
+    chunks: list[list[str]] = [[]]
+    chunk_len: list[int] = [0]
+
+    # the formatting only depends on the bettor's state, pick the template once
+    template = "- *{}*\n" if bettor.locked else "- {}\n"
+    if bettor.cancelled:
+        template = f"~~{template}~~"
 
     for nba in bettor.proposal:
-        cb_text = nba.description(short=short, include_emoji=True, bot=bot, is_trade=True)
-        if bettor.locked:
-            text = f"- *{cb_text}*\n"
-        else:
-            text = f"- {cb_text}\n"
-        if bettor.cancelled:
-            text = f"~~{text}~~"
-
-        if len(text) + len(proposal[i]) > 950:
-            i += 1
-            proposal.append("")
-        proposal[i] += text
+        text = template.format(_describe(bettor, nba, bot, short))
+
+        if chunks[-1] and chunk_len[-1] + len(text) > 950:
+            chunks.append([])
+            chunk_len.append(0)
+        chunks[-1].append(text)
+        chunk_len[-1] += len(text)
 
+    proposal = ["".join(chunk) for chunk in chunks]
     if not proposal[0]:
         proposal[0] = "*Empty*"
 
+    bettor._rendered_cache = (signature, proposal)
     return proposal
 
 
@@ -89,48 +110,43 @@ class BetHistoryFormat(menus.ListPageSource):
     ):
         self.header = header
         self.bot = bot
-        super().__init__(entries, per_page=1)
-
-    async def format_page(self, menu: Pages, bet: BetHistory) -> discord.Embed:
-        from ballsdex.core.models import Player
-        
-        # Load player data by discord_id
-        player1 = await Player.get_or_none(discord_id=bet.player1_id)
-        player2 = await Player.get_or_none(discord_id=bet.player2_id)
-        
-        player1_name = player1.username if player1 else f"User #{bet.player1_id}"
-        player2_name = player2.username if player2 else f"User #{bet.player2_id}"
-        
-        embed = discord.Embed(
-            title=f"Bet history for {self.header}",
-            description=f"Bet ID: {bet.pk:0X}",
-            timestamp=bet.bet_date,
-        )
-        embed.set_footer(
-            text=f"Bet {menu.current_page + 1}/{menu.source.get_max_pages()} | Bet date: "
-        )
-        
-        # Determine winner emojis
-        p1_emoji = "🎉" if bet.winner_id == bet.player1_id else "❌"
-        p2_emoji = "🎉" if bet.winner_id == bet.player2_id else "❌"
-        
-        # Build descriptions showing stake counts
-        p1_desc = f"Staked {bet.player1_count} NBA{'s' if bet.player1_count != 1 else ''}"
-        p2_desc = f"Staked {bet.player2_count} NBA{'s' if bet.player2_count != 1 else ''}"
-        
-        if bet.cancelled:
-            p1_desc += "\n*Bet cancelled*"
-            p2_desc += "\n*Bet cancelled*"
-        
-        embed.add_field(
-            name=f"{p1_emoji} {player1_name}",
-            value=p1_desc,
-            inline=True,
-        )
-        embed.add_field(
-            name=f"{p2_emoji} {player2_name}",
-            value=p2_desc,
-            inline=True,
-        )
-        
+        self.player_map: dict[int, Player] = {}
+        super().__init__(entries, per_page=5)
+
+    async def prepare(self):
+        # load every player referenced in the history at once instead of twice per page
+        ids = {bet.player1_id for bet in self.entries} | {bet.player2_id for bet in self.entries}
+        players = await Player.filter(discord_id__in=ids)
+        self.player_map = {player.discord_id: player for player in players}
+
+    async def format_page(self, menu: Pages, bets: list[BetHistory]) -> discord.Embed:
+        embed = discord.Embed(title=f"Bet history for {self.header}")
+        embed.set_footer(text=f"Page {menu.current_page + 1}/{menu.source.get_max_pages()}")
+
+        for bet in bets:
+            player1 = self.player_map.get(bet.player1_id)
+            player2 = self.player_map.get(bet.player2_id)
+
+            player1_name = player1.username if player1 else f"User #{bet.player1_id}"
+            player2_name = player2.username if player2 else f"User #{bet.player2_id}"
+
+            # Determine winner emojis
+            p1_emoji = "🎉" if bet.winner_id == bet.player1_id else "❌"
+            p2_emoji = "🎉" if bet.winner_id == bet.player2_id else "❌"
+
+            # Build a summary showing stake counts
+            value = (
+                f"Bet ID: {bet.pk:0X} • {format_dt(bet.bet_date, style='R')}\n"
+                f"Staked {bet.player1_count} NBA{'s' if bet.player1_count != 1 else ''} vs "
+                f"{bet.player2_count} NBA{'s' if bet.player2_count != 1 else ''}"
+            )
+            if bet.cancelled:
+                value += "\n*Bet cancelled*"
+
+            embed.add_field(
+                name=f"{p1_emoji} {player1_name} vs {p2_emoji} {player2_name}",
+                value=value,
+                inline=False,
+            )
+
         return embed
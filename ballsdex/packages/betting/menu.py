@@ -2,11 +2,12 @@ import asyncio
 import logging
 import random
 from datetime import datetime, timedelta, timezone
-from typing import TYPE_CHECKING, AsyncIterator, List, Set, cast
+from typing import TYPE_CHECKING, AsyncIterator, List, cast
 
 import discord
 from discord.ui import Button, View, button
 from discord.utils import format_dt, utcnow
+from tortoise.transactions import in_transaction
 
 from ballsdex.core.models import BallInstance
 from ballsdex.core.utils import menus
@@ -22,6 +23,8 @@ if TYPE_CHECKING:
 
 log = logging.getLogger("ballsdex.packages.betting.menu")
 BET_TIMEOUT = 30
+# seconds to wait after a change before editing the message, bursts are coalesced
+REFRESH_DELAY = 1
 
 
 class InvalidBetOperation(Exception):
@@ -101,7 +104,8 @@ class BetView(View):
             )
             return
 
-        bettor.proposal.clear()
+        bettor.clear_proposal()
+        self.bet.mark_dirty()
         await interaction.followup.send("Proposal cleared.", ephemeral=True)
 
     @button(
@@ -215,18 +219,26 @@ class BetMenu:
         self.channel: discord.TextChannel = cast(discord.TextChannel, interaction.channel)
         self.bettor1 = bettor1
         self.bettor2 = bettor2
+        self._bettor_by_id = {bettor1.user.id: bettor1, bettor2.user.id: bettor2}
         self.embed = discord.Embed()
         self.task: asyncio.Task | None = None
         self.current_view: BetView | ConfirmView = BetView(self)
         self.message: discord.Message
         self.cooldown_start_time: datetime | None = None
+        # set once the bet is cancelled or concluded, checked by the cog when looking up bets
+        self._dead = False
+        # set when the proposals or the state changed since the last refresh of the message
+        self._dirty_event = asyncio.Event()
+
+    def mark_dirty(self):
+        """Schedule a refresh of the bet message after a change to the proposals or state."""
+        self._dirty_event.set()
 
     def _get_bettor(self, user: discord.User | discord.Member) -> BettingUser:
-        if user.id == self.bettor1.user.id:
-            return self.bettor1
-        elif user.id == self.bettor2.user.id:
-            return self.bettor2
-        raise RuntimeError(f"User with ID {user.id} cannot be found in the bet")
+        try:
+            return self._bettor_by_id[user.id]
+        except KeyError:
+            raise RuntimeError(f"User with ID {user.id} cannot be found in the bet") from None
 
     def _generate_embed(self):
         add_command = "`/bet add`"
@@ -245,21 +257,31 @@ class BetMenu:
             f"Use the {view_command} command to see the full list of NBAs."
         )
         self.embed.set_footer(
-            text="This message is updated every 15 seconds, "
-            "but you can keep on editing your proposal."
+            text="This message is updated a few seconds after each change, "
+            "you can keep on editing your proposal."
         )
 
     async def update_message_loop(self):
-        """A loop task that updates every 15 seconds with the new content."""
+        """A loop task that updates the message whenever the bet changes."""
         assert self.task
         start_time = utcnow()
 
         while True:
-            await asyncio.sleep(15)
+            try:
+                await asyncio.wait_for(self._dirty_event.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                pass
             if utcnow() - start_time > timedelta(minutes=BET_TIMEOUT):
                 self.bot.loop.create_task(self.cancel("The bet timed out"))
                 return
 
+            if not self._dirty_event.is_set():
+                continue
+
+            # let bursts of changes settle so they end up in a single edit
+            await asyncio.sleep(REFRESH_DELAY)
+            # reset before rendering, changes made while editing are picked up next time
+            self._dirty_event.clear()
             try:
                 fill_bet_embed_fields(self.embed, self.bot, self.bettor1, self.bettor2)
                 await self.message.edit(embed=self.embed)
@@ -285,6 +307,7 @@ class BetMenu:
 
     async def cancel(self, reason: str = "The bet has been cancelled."):
         """Cancel the bet immediately."""
+        self._dead = True
         if self.task:
             self.task.cancel()
         self.current_view.stop()
@@ -301,6 +324,7 @@ class BetMenu:
     async def lock(self, bettor: BettingUser):
         """Mark a user's proposal as locked, ready for next stage"""
         bettor.locked = True
+        self.mark_dirty()
         if self.bettor1.locked and self.bettor2.locked:
             if self.task:
                 self.task.cancel()
@@ -321,27 +345,33 @@ class BetMenu:
     async def user_cancel(self, bettor: BettingUser):
         """Register a user request to cancel the bet"""
         bettor.cancelled = True
+        self.mark_dirty()
         await self.cancel()
 
     async def confirm(self, bettor: BettingUser) -> bool:
         """Mark a user's proposal as accepted. If both users accept, end the bet now"""
         result = True
         bettor.accepted = True
+        self.mark_dirty()
         fill_bet_embed_fields(self.embed, self.bot, self.bettor1, self.bettor2)
         if self.bettor1.accepted and self.bettor2.accepted:
             if self.task and not self.task.cancelled():
                 self.task.cancel()
 
             # Randomly select winner and perform bet resolution
-            winner_is_bettor1 = random.choice([True, False])
+            winner_is_bettor1 = bool(random.getrandbits(1))
             winner = self.bettor1 if winner_is_bettor1 else self.bettor2
             loser = self.bettor2 if winner_is_bettor1 else self.bettor1
 
             # Transfer loser's NBAs to winner
             try:
-                for nba in loser.proposal:
-                    nba.player = winner.player
-                    await nba.save()
+                if loser.proposal:
+                    async with in_transaction():
+                        await BallInstance.filter(
+                            pk__in=[nba.pk for nba in loser.proposal]
+                        ).update(player_id=winner.player.pk)
+                    for nba in loser.proposal:
+                        nba.player = winner.player
             except Exception as e:
                 log.error(f"Error transferring NBAs: {e}")
                 self.embed.description = "Error concluding bet!"
@@ -351,6 +381,7 @@ class BetMenu:
                 self.embed.description = f"🎉 {winner.user.name} won the bet!"
                 self.embed.colour = discord.Colour.green()
 
+            self._dead = True
             self.current_view.stop()
             for item in self.current_view.children:
                 item.disabled = True  # type: ignore
@@ -365,6 +396,8 @@ class BallsSource(menus.ListPageSource):
     def __init__(self, entries: list[int]):
         super().__init__(entries, per_page=25)
         self.cache: dict[int, BallInstance] = {}
+        # page number -> pending look-ahead query for that page
+        self.prefetch_tasks: dict[int, asyncio.Task] = {}
 
     async def prepare(self):
         first_entries = (
@@ -372,25 +405,62 @@ class BallsSource(menus.ListPageSource):
             if len(self.entries) > self.per_page * 5
             else self.entries
         )
-        balls = await BallInstance.filter(id__in=first_entries)
+        balls = await BallInstance.filter(id__in=first_entries).select_related(
+            "ball", "special", "player"
+        )
         for ball in balls:
             self.cache[ball.pk] = ball
 
-    async def fetch_page(self, ball_ids: list[int]) -> AsyncIterator[BallInstance]:
-        if ball_ids[0] not in self.cache:
-            async for ball in BallInstance.filter(id__in=ball_ids):
+    async def get_balls(self, ball_ids: list[int]) -> list[BallInstance]:
+        """Return the given instances, only querying the ones missing from the cache."""
+        missing = [id for id in ball_ids if id not in self.cache]
+        if missing:
+            async for ball in BallInstance.filter(id__in=missing).select_related(
+                "ball", "special", "player"
+            ):
                 self.cache[ball.pk] = ball
-        for id in ball_ids:
-            yield self.cache[id]
+        return [self.cache[id] for id in ball_ids if id in self.cache]
+
+    async def _prefetch(self, ball_ids: list[int]):
+        try:
+            await self.get_balls(ball_ids)
+        except Exception:
+            log.exception("Failed to prefetch the next page of the bet selector")
+
+    def prefetch_next_pages(self, page_number: int, count: int = 2):
+        """Start loading the next pages in the background so that page flips don't wait."""
+        max_pages = self.get_max_pages()
+        for page in range(page_number + 1, min(page_number + 1 + count, max_pages)):
+            if page in self.prefetch_tasks:
+                continue
+            start = page * self.per_page
+            ids = [
+                id for id in self.entries[start : start + self.per_page] if id not in self.cache
+            ]
+            if ids:
+                self.prefetch_tasks[page] = asyncio.create_task(self._prefetch(ids))
+
+    async def fetch_page(
+        self, ball_ids: list[int], page_number: int
+    ) -> AsyncIterator[BallInstance]:
+        if task := self.prefetch_tasks.pop(page_number, None):
+            await task
+        for ball in await self.get_balls(ball_ids):
+            yield ball
 
     async def format_page(self, menu: "BallsSelector", ball_ids: list[int]):
-        await menu.set_options(self.fetch_page(ball_ids))
+        await menu.set_options(self.fetch_page(ball_ids, menu.current_page))
+        self.prefetch_next_pages(menu.current_page)
         return True
 
 
 class BallsSelector(Pages):
     """Selector for bulk adding NBAs to bet"""
-    
+
+    # maximum number of NBAs listed by the selector (20 pages of 25)
+    MAX_BALLS = 500
+    source: BallsSource
+
     def __init__(
         self,
         interaction: discord.Interaction["BallsDexBot"],
@@ -405,15 +475,32 @@ class BallsSelector(Pages):
         self.add_item(self.confirm_button)
         self.add_item(self.select_all_button)
         self.add_item(self.clear_button)
-        self.balls_selected: Set[BallInstance] = set()
+        self.balls_selected: dict[int, BallInstance] = {}
         self.cog = cog
+        # emojis resolved while browsing, keyed by emoji ID and special ID
+        self._emojis: dict[int, discord.Emoji | None] = {}
+        self._special_emojis: dict[int | None, str] = {}
+
+    def _get_emoji(self, emoji_id: int) -> discord.Emoji | None:
+        try:
+            return self._emojis[emoji_id]
+        except KeyError:
+            emoji = self._emojis[emoji_id] = self.bot.get_emoji(emoji_id)
+            return emoji
+
+    def _get_special_emoji(self, ball: BallInstance) -> str:
+        try:
+            return self._special_emojis[ball.special_id]
+        except KeyError:
+            special = self._special_emojis[ball.special_id] = ball.special_emoji(self.bot, True)
+            return special
 
     async def set_options(self, balls: AsyncIterator[BallInstance]):
         options: List[discord.SelectOption] = []
         async for ball in balls:
-            emoji = self.bot.get_emoji(int(ball.countryball.emoji_id))
+            emoji = self._get_emoji(ball.countryball.emoji_id)
             favorite = f"{settings.favorited_collectible_emoji} " if ball.favorite else ""
-            special = ball.special_emoji(self.bot, True)
+            special = self._get_special_emoji(ball)
             options.append(
                 discord.SelectOption(
                     label=f"{favorite}{special}#{ball.pk:0X} {ball.countryball.country}",
@@ -421,7 +508,7 @@ class BallsSelector(Pages):
                     f"Caught on {ball.catch_date.strftime('%d/%m/%y %H:%M')}",
                     emoji=emoji,
                     value=f"{ball.pk}",
-                    default=ball in self.balls_selected,
+                    default=ball.pk in self.balls_selected,
                 )
             )
         self.select_ball_menu.options = options
@@ -431,11 +518,8 @@ class BallsSelector(Pages):
     async def select_ball_menu(
         self, interaction: discord.Interaction["BallsDexBot"], item: discord.ui.Select
     ):
-        for value in item.values:
-            ball_instance = await BallInstance.get(id=int(value)).prefetch_related(
-                "ball", "player"
-            )
-            self.balls_selected.add(ball_instance)
+        balls = await self.source.get_balls([int(value) for value in item.values])
+        self.balls_selected.update((ball.pk, ball) for ball in balls)
         await interaction.response.defer()
 
     @discord.ui.button(label="Select Page", style=discord.ButtonStyle.secondary)
@@ -443,12 +527,14 @@ class BallsSelector(Pages):
         self, interaction: discord.Interaction["BallsDexBot"], button: Button
     ):
         await interaction.response.defer(thinking=True, ephemeral=True)
-        for ball in self.select_ball_menu.options:
-            ball_instance = await BallInstance.get(id=int(ball.value)).prefetch_related(
-                "ball", "player"
-            )
-            if ball_instance not in self.balls_selected:
-                self.balls_selected.add(ball_instance)
+        ids = [
+            int(option.value)
+            for option in self.select_ball_menu.options
+            if int(option.value) not in self.balls_selected
+        ]
+        if ids:
+            balls = await self.source.get_balls(ids)
+            self.balls_selected.update((ball.pk, ball) for ball in balls)
         await interaction.followup.send(
             "All NBAs on this page have been selected.\n"
             "Note that the menu may not reflect this change until you change page.",
@@ -472,7 +558,7 @@ class BallsSelector(Pages):
                 "You can click the cancel button to stop the bet instead.",
                 ephemeral=True,
             )
-        if any(ball in bettor.proposal for ball in self.balls_selected):
+        if not bettor.proposal_ids.isdisjoint(self.balls_selected):
             return await interaction.followup.send(
                 "You have already added some of the NBAs you selected.",
                 ephemeral=True,
@@ -484,22 +570,20 @@ class BallsSelector(Pages):
                 ephemeral=True,
             )
         
-        for ball in self.balls_selected:
-            if ball.favorite:
-                view = ConfirmChoiceView(interaction)
-                await interaction.followup.send(
-                    "One or more of the NBAs is favorited, "
-                    "are you sure you want to add it to the bet?",
-                    view=view,
-                    ephemeral=True,
-                )
-                await view.wait()
-                if not view.value:
-                    return
-                break
+        if any(ball.favorite for ball in self.balls_selected.values()):
+            view = ConfirmChoiceView(interaction)
+            await interaction.followup.send(
+                "One or more of the NBAs is favorited, "
+                "are you sure you want to add it to the bet?",
+                view=view,
+                ephemeral=True,
+            )
+            await view.wait()
+            if not view.value:
+                return
         
-        for ball in self.balls_selected:
-            bettor.proposal.append(ball)
+        bettor.add_to_proposal(*self.balls_selected.values())
+        bet.mark_dirty()
         
         grammar = "NBA" if len(self.balls_selected) == 1 else "NBAs"
         await interaction.followup.send(
@@ -1,13 +1,16 @@
+import asyncio
 import logging
 import random
-from typing import TYPE_CHECKING, Optional, List, Set, AsyncIterator, cast
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, Optional, List, Set
+from weakref import WeakValueDictionary
 
 import discord
+from cachetools import TTLCache
 from discord import app_commands
 from discord.ext import commands
 from discord.ui import Button
-from tortoise import timezone
-from tortoise.expressions import Q
+from tortoise import Tortoise, timezone
 from tortoise.transactions import in_transaction
 
 from ballsdex.core.models import (
@@ -18,6 +21,7 @@ from ballsdex.core.models import (
     Player,
     PlayerPack,
     Special,
+    balls,
 )
 from ballsdex.core.utils import menus
 from ballsdex.core.utils.paginator import Pages
@@ -26,24 +30,208 @@ from ballsdex.core.utils.transformers import BallInstanceTransform, BallEnabledT
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
+    from tortoise.backends.base.client import BaseDBAsyncClient
+    from tortoise.queryset import QuerySet
+
     from ballsdex.core.bot import BallsDexBot
 
 log = logging.getLogger("ballsdex.packages.coins")
 
-_active_operations: Set[int] = set()
+# one lock per user so that coins and packs operations can't overlap, entries are dropped
+# once nothing references the lock anymore
+_user_locks: "WeakValueDictionary[int, asyncio.Lock]" = WeakValueDictionary()
+
+
+def _get_user_lock(user_id: int) -> asyncio.Lock:
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = _user_locks[user_id] = asyncio.Lock()
+    return lock
+
+# packs rarely change and autocompletion runs on every keystroke, same for the leaderboard
+_packs_cache: TTLCache[str, list[Pack]] = TTLCache(maxsize=1, ttl=30)
+_leaderboard_cache: TTLCache[str, list[Player]] = TTLCache(maxsize=1, ttl=30)
+# discord ID -> player ID, saves the get_or_create of commands that only need the ID
+_player_ids: TTLCache[int, int] = TTLCache(maxsize=10000, ttl=60)
+
+
+async def _quicksell_total(
+    ball_ids: Iterable[int], connection: "BaseDBAsyncClient | None" = None
+) -> int:
+    """
+    Sum the quicksell value of the given instances in a single query. Specials are worth
+    50% more, rounded down like when selling a single instance.
+    """
+    ball_ids = list(ball_ids)
+    if not ball_ids:
+        return 0
+    connection = connection or Tortoise.get_connection("default")
+    rows = await connection.execute_query_dict(
+        "SELECT COALESCE(SUM(CASE WHEN bi.special_id IS NULL THEN b.quicksell_value "
+        "ELSE FLOOR(b.quicksell_value * 1.5) END), 0)::BIGINT AS total "
+        "FROM ballinstance bi JOIN ball b ON b.id = bi.ball_id WHERE bi.id = ANY($1)",
+        [ball_ids],
+    )
+    return rows[0]["total"]
+
+
+async def _add_coins(
+    discord_id: int, amount: int, connection: "BaseDBAsyncClient | None" = None
+) -> int | None:
+    """
+    Add ``amount`` coins to a player, or remove them if negative, in a single UPDATE.
+
+    Returns the new balance, or ``None`` if the player doesn't exist or doesn't have enough
+    coins for the debit.
+    """
+    connection = connection or Tortoise.get_connection("default")
+    rows = await connection.execute_query_dict(
+        "UPDATE player SET coins = coins + $2 "
+        "WHERE discord_id = $1 AND ($2 >= 0 OR coins + $2 >= 0) RETURNING coins",
+        [discord_id, amount],
+    )
+    return rows[0]["coins"] if rows else None
+
+
+async def _create_instances(
+    connection: "BaseDBAsyncClient",
+    rolls: list[tuple[Ball, int, int]],
+    *,
+    player_id: int,
+    special: Special | None,
+    server_id: int | None,
+) -> list[BallInstance]:
+    """
+    Insert one instance per ``(ball, attack_bonus, health_bonus)`` roll in a single statement.
+
+    Unlike ``bulk_create``, the IDs of the new rows are returned, and instances are given back
+    in the same order as the rolls.
+    """
+    rows = await connection.execute_query_dict(
+        "INSERT INTO ballinstance (ball_id, attack_bonus, health_bonus, player_id, special_id, "
+        "server_id, catch_date, favorite, tradeable, extra_data, deleted) "
+        "SELECT t.ball_id, t.attack_bonus, t.health_bonus, $4, $5, $6, NOW(), FALSE, TRUE, '{}', "
+        "FALSE FROM unnest($1::int[], $2::int[], $3::int[]) WITH ORDINALITY "
+        "AS t(ball_id, attack_bonus, health_bonus, n) ORDER BY t.n RETURNING id",
+        [
+            [ball.pk for ball, _, _ in rolls],
+            [attack_bonus for _, attack_bonus, _ in rolls],
+            [health_bonus for _, _, health_bonus in rolls],
+            player_id,
+            special.pk if special else None,
+            server_id,
+        ],
+    )
+    # IDs come from a sequence, following the insertion order
+    instances: list[BallInstance] = []
+    for pk, (ball, attack_bonus, health_bonus) in zip(sorted(r["id"] for r in rows), rolls):
+        instance = BallInstance(
+            ball=ball,
+            player_id=player_id,
+            attack_bonus=attack_bonus,
+            health_bonus=health_bonus,
+            special=special,
+            server_id=server_id,
+        )
+        instance.pk = pk
+        instances.append(instance)
+    return instances
+
+
+async def _add_packs(
+    player_id: int, pack_id: int, amount: int, connection: "BaseDBAsyncClient | None" = None
+) -> int:
+    """
+    Give ``amount`` packs to a player in a single upsert, relying on the (player, pack) unique
+    constraint. Returns the new quantity owned.
+    """
+    connection = connection or Tortoise.get_connection("default")
+    rows = await connection.execute_query_dict(
+        "INSERT INTO playerpack (player_id, pack_id, quantity) VALUES ($1, $2, $3) "
+        "ON CONFLICT (player_id, pack_id) "
+        "DO UPDATE SET quantity = playerpack.quantity + EXCLUDED.quantity RETURNING quantity",
+        [player_id, pack_id, amount],
+    )
+    return rows[0]["quantity"]
+
+
+async def _take_packs(
+    player_pack_id: int, amount: int, connection: "BaseDBAsyncClient | None" = None
+) -> int | None:
+    """
+    Remove ``amount`` packs from an owned pack in a single UPDATE.
+
+    Returns the remaining quantity, or ``None`` if there aren't enough packs.
+    """
+    connection = connection or Tortoise.get_connection("default")
+    rows = await connection.execute_query_dict(
+        "UPDATE playerpack SET quantity = quantity - $2 "
+        "WHERE id = $1 AND quantity >= $2 RETURNING quantity",
+        [player_pack_id, amount],
+    )
+    return rows[0]["quantity"] if rows else None
+
+
+async def _unlock_instances(ball_ids: list[int], lock_time: datetime):
+    """
+    Release in one query the instances locked at ``lock_time``, including the ones sold since.
+    """
+    await BallInstance.all_objects.filter(id__in=ball_ids, locked=lock_time).update(locked=None)
+
+
+async def _get_player_id(discord_id: int) -> int:
+    player_id = _player_ids.get(discord_id)
+    if player_id is None:
+        player, _ = await Player.get_or_create(discord_id=discord_id)
+        player_id = _player_ids[discord_id] = player.pk
+    return player_id
+
+
+async def _count_daily_opens(player_id: int, pack: Pack, since: datetime) -> int:
+    """
+    Count the packs of this kind a player opened since ``since``, using the
+    (player, pack, opened_at) index. Packs without a daily limit aren't counted.
+    """
+    if pack.daily_limit <= 0:
+        return 0
+    return await PackOpenHistory.filter(
+        player_id=player_id, pack=pack, opened_at__gte=since
+    ).count()
+
+
+async def _get_special_ball_ids(special: Special | None) -> set[int]:
+    """
+    IDs of the balls owned at least once with the given special, deduplicated by the database.
+    """
+    if special is None:
+        return set()
+    return set(
+        await BallInstance.filter(special=special, deleted=False)
+        .distinct()
+        .values_list("ball_id", flat=True)
+    )
+
+
+async def _get_enabled_packs() -> list[Pack]:
+    packs = _packs_cache.get("enabled")
+    if packs is None:
+        packs = await Pack.filter(enabled=True).order_by("price")
+        _packs_cache["enabled"] = packs
+    return packs
 
 
 class ConfirmView(discord.ui.View):
     def __init__(self, user: discord.User | discord.Member, timeout: float = 60):
         super().__init__(timeout=timeout)
         self.user = user
+        self.user_id = user.id
         self.value: Optional[bool] = None
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.user.id:
-            await interaction.response.send_message("This is not your confirmation!", ephemeral=True)
-            return False
-        return True
+        if interaction.user.id == self.user_id:
+            return True
+        await interaction.response.send_message("This is not your confirmation!", ephemeral=True)
+        return False
 
     @discord.ui.button(emoji="✔", style=discord.ButtonStyle.success)
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -58,43 +246,54 @@ class ConfirmView(discord.ui.View):
         self.stop()
 
 
-class BulkSellSource(menus.ListPageSource):
-    def __init__(self, entries: List[int]):
-        super().__init__(entries, per_page=25)
-        self.cache: dict[int, BallInstance] = {}
+class BulkSellSource(menus.PageSource):
+    """
+    Pages through a queryset of ball instances, only fetching the rows of the page shown.
+    """
 
-    async def prepare(self):
-        first_entries = (
-            self.entries[: self.per_page * 5]
-            if len(self.entries) > self.per_page * 5
-            else self.entries
+    def __init__(self, query: "QuerySet[BallInstance]", count: int, per_page: int = 25):
+        self.query = query
+        self.count = count
+        self.per_page = per_page
+
+    def is_paginating(self) -> bool:
+        return self.count > self.per_page
+
+    def get_max_pages(self) -> int:
+        return max(1, -(-self.count // self.per_page))
+
+    async def get_page(self, page_number: int) -> List[BallInstance]:
+        return await (
+            self.query.offset(page_number * self.per_page)
+            .limit(self.per_page)
+            .select_related("ball", "special")
         )
-        balls = await BallInstance.filter(id__in=first_entries).prefetch_related("ball", "special")
-        for ball in balls:
-            self.cache[ball.pk] = ball
-
-    async def fetch_page(self, ball_ids: List[int]) -> AsyncIterator[BallInstance]:
-        if ball_ids and ball_ids[0] not in self.cache:
-            async for ball in BallInstance.filter(id__in=ball_ids).prefetch_related("ball", "special"):
-                self.cache[ball.pk] = ball
-        for id in ball_ids:
-            if id in self.cache:
-                yield self.cache[id]
-
-    async def format_page(self, menu: "BulkSellSelector", ball_ids: List[int]):
-        await menu.set_options(self.fetch_page(ball_ids))
+
+    async def format_page(self, menu: "BulkSellSelector", balls: List[BallInstance]):
+        menu.set_options(balls)
         return True
 
 
+_OPTION_DESCRIPTION = "ATK: {attack:+d}% • HP: {health:+d}% • {value:,} coins"
+
+
+def _quicksell_value(ball: BallInstance) -> int:
+    value = ball.countryball.quicksell_value
+    if ball.specialcard:
+        value = int(value * 1.5)
+    return value
+
+
 class BulkSellSelector(Pages):
     def __init__(
         self,
         interaction: discord.Interaction["BallsDexBot"],
-        balls: List[int],
+        query: "QuerySet[BallInstance]",
+        count: int,
     ):
         self.bot = interaction.client
         self.interaction = interaction
-        source = BulkSellSource(balls)
+        source = BulkSellSource(query, count)
         super().__init__(source, interaction=interaction)
         self.source = source
         self.add_item(self.select_ball_menu)
@@ -104,25 +303,27 @@ class BulkSellSelector(Pages):
         self.balls_selected: Set[int] = set()
         self.confirmed = False
 
-    async def set_options(self, balls: AsyncIterator[BallInstance]):
-        options: List[discord.SelectOption] = []
-        async for ball in balls:
-            if ball.favorite or ball.deleted:
-                continue
-            emoji = self.bot.get_emoji(int(ball.countryball.emoji_id))
-            special = ball.special_emoji(self.bot, True)
-            value = ball.countryball.quicksell_value
-            if ball.specialcard:
-                value = int(value * 1.5)
-            options.append(
-                discord.SelectOption(
-                    label=f"{special}#{ball.pk:0X} {ball.countryball.country}",
-                    description=f"ATK: {ball.attack_bonus:+d}% • HP: {ball.health_bonus:+d}% • {value:,} coins",
-                    emoji=emoji,
-                    value=f"{ball.pk}",
-                    default=ball.pk in self.balls_selected,
-                )
+    def set_options(self, balls: List[BallInstance]):
+        get_emoji = self.bot.get_emoji
+        selected = self.balls_selected
+        options = [
+            discord.SelectOption(
+                label=(
+                    f"{ball.special_emoji(self.bot, True)}#{ball.pk:0X} "
+                    f"{ball.countryball.country}"
+                ),
+                description=_OPTION_DESCRIPTION.format(
+                    attack=ball.attack_bonus,
+                    health=ball.health_bonus,
+                    value=_quicksell_value(ball),
+                ),
+                emoji=get_emoji(ball.countryball.emoji_id),
+                value=str(ball.pk),
+                default=ball.pk in selected,
             )
+            for ball in balls
+            if not ball.favorite and not ball.deleted
+        ]
         if options:
             self.select_ball_menu.options = options
             self.select_ball_menu.max_values = len(options)
@@ -141,16 +342,7 @@ class BulkSellSelector(Pages):
         self, interaction: discord.Interaction["BallsDexBot"], item: discord.ui.Select
     ):
         await interaction.response.defer()
-        for value in item.values:
-            if value == "none":
-                continue
-            ball_id = int(value)
-            if ball_id in self.source.cache:
-                self.balls_selected.add(ball_id)
-            else:
-                ball_instance = await BallInstance.get(id=ball_id).prefetch_related("ball", "special")
-                self.source.cache[ball_id] = ball_instance
-                self.balls_selected.add(ball_id)
+        self.balls_selected.update(int(value) for value in item.values if value != "none")
 
     @discord.ui.button(label="Confirm", style=discord.ButtonStyle.primary)
     async def confirm_button(
@@ -210,7 +402,7 @@ class PackTransform(app_commands.Transformer):
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
         try:
-            packs = await Pack.filter(enabled=True).order_by("price")
+            packs = await _get_enabled_packs()
             choices = []
             for pack in packs:
                 if current.lower() in pack.name.lower():
@@ -226,13 +418,19 @@ class PackTransform(app_commands.Transformer):
 
 class OwnedPackTransform(app_commands.Transformer):
     async def transform(self, interaction: discord.Interaction, value: str) -> PlayerPack:
-        player, _ = await Player.get_or_create(discord_id=interaction.user.id)
+        player_id = await _get_player_id(interaction.user.id)
         try:
-            player_pack = await PlayerPack.get(id=int(value), player=player)
+            player_pack = await PlayerPack.get(id=int(value), player_id=player_id).select_related(
+                "pack__special"
+            )
         except Exception:
-            player_pack = await PlayerPack.filter(
-                player=player, pack__name__icontains=value, quantity__gt=0
-            ).first()
+            player_pack = (
+                await PlayerPack.filter(
+                    player_id=player_id, pack__name__icontains=value, quantity__gt=0
+                )
+                .select_related("pack__special")
+                .first()
+            )
         if not player_pack or player_pack.quantity <= 0:
             raise app_commands.TransformerError(value, type(value), self)
         return player_pack
@@ -241,8 +439,10 @@ class OwnedPackTransform(app_commands.Transformer):
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
         try:
-            player, _ = await Player.get_or_create(discord_id=interaction.user.id)
-            player_packs = await PlayerPack.filter(player=player, quantity__gt=0).prefetch_related("pack")
+            player_id = await _get_player_id(interaction.user.id)
+            player_packs = await PlayerPack.filter(
+                player_id=player_id, quantity__gt=0
+            ).prefetch_related("pack")
             choices = []
             for pp in player_packs:
                 if current.lower() in pp.pack.name.lower():
@@ -260,6 +460,15 @@ class Coins(commands.GroupCog, group_name="coins"):
     def __init__(self, bot: "BallsDexBot"):
         self.bot = bot
 
+    async def _resolve_user(self, discord_id: int) -> discord.User | None:
+        user = self.bot.get_user(discord_id)
+        if user is None:
+            try:
+                user = await self.bot.fetch_user(discord_id)
+            except discord.HTTPException:
+                return None
+        return user
+
     @app_commands.command()
     async def balance(self, interaction: discord.Interaction):
         """
@@ -281,21 +490,22 @@ class Coins(commands.GroupCog, group_name="coins"):
         """
         await interaction.response.defer()
         
-        top_players = await Player.filter(coins__gt=0).order_by("-coins").limit(10)
+        top_players = _leaderboard_cache.get("top")
+        if top_players is None:
+            top_players = await Player.filter(coins__gt=0).order_by("-coins").limit(10)
+            _leaderboard_cache["top"] = top_players
         
         if not top_players:
             await interaction.followup.send("No players with coins found!")
             return
         
+        users = await asyncio.gather(*(self._resolve_user(p.discord_id) for p in top_players))
+        
         medals = ["🥇", "🥈", "🥉"]
         lines = []
         
-        for i, player in enumerate(top_players):
-            try:
-                user = await self.bot.fetch_user(player.discord_id)
-                username = user.display_name
-            except Exception:
-                username = f"Unknown User"
+        for i, (player, user) in enumerate(zip(top_players, users)):
+            username = user.display_name if user else "Unknown User"
             
             if i < 3:
                 lines.append(f"{medals[i]} **{username}** — `{player.coins:,}` coins")
@@ -338,37 +548,34 @@ class Coins(commands.GroupCog, group_name="coins"):
             await interaction.response.send_message("Amount must be at least 1!", ephemeral=True)
             return
         
-        if interaction.user.id in _active_operations:
+        lock = _get_user_lock(interaction.user.id)
+        if lock.locked():
             await interaction.response.send_message("You have another operation in progress!", ephemeral=True)
             return
         
-        _active_operations.add(interaction.user.id)
-        try:
-            async with in_transaction():
-                player = await Player.get_or_none(discord_id=interaction.user.id)
-                if not player:
-                    player = await Player.create(discord_id=interaction.user.id)
-                
-                if player.coins < amount:
+        async with lock:
+            # both players must exist for the UPDATEs to match, created outside the transaction
+            # so that a rollback can't leave a cached ID behind
+            await _get_player_id(interaction.user.id)
+            await _get_player_id(user.id)
+            
+            async with in_transaction() as connection:
+                # the balance check and the debit are a single atomic UPDATE
+                balance = await _add_coins(interaction.user.id, -amount, connection)
+                if balance is None:
+                    player = await Player.get(discord_id=interaction.user.id)
                     await interaction.response.send_message(
                         f"You don't have enough coins! You have **{player.coins:,}** coins.",
                         ephemeral=True
                     )
                     return
                 
-                recipient, _ = await Player.get_or_create(discord_id=user.id)
-                
-                player.coins -= amount
-                recipient.coins += amount
-                await player.save(update_fields=["coins"])
-                await recipient.save(update_fields=["coins"])
+                await _add_coins(user.id, amount, connection)
             
             await interaction.response.send_message(
                 f"{interaction.user.mention} gave **{amount:,}** coins to {user.mention}!\n"
-                f"New balance: **{player.coins:,}** coins"
+                f"New balance: **{balance:,}** coins"
             )
-        finally:
-            _active_operations.discard(interaction.user.id)
 
     @app_commands.command()
     async def sell(
@@ -398,88 +605,86 @@ class Coins(commands.GroupCog, group_name="coins"):
             )
             return
 
-        if interaction.user.id in _active_operations:
+        lock = _get_user_lock(interaction.user.id)
+        if lock.locked():
             await interaction.response.send_message("You have another operation in progress!", ephemeral=True)
             return
 
-        _active_operations.add(interaction.user.id)
-        try:
-            await countryball.lock_for_trade()
+        async with lock:
+            try:
+                owner_id = countryball.player_id
+                await countryball.lock_for_trade()
             
-            ball = countryball.countryball
-            sell_value = ball.quicksell_value
+                ball = countryball.countryball
+                sell_value = ball.quicksell_value
             
-            bonus_multiplier = 1.0
-            if countryball.specialcard:
-                bonus_multiplier = 1.5
+                bonus_multiplier = 1.0
+                if countryball.specialcard:
+                    bonus_multiplier = 1.5
             
-            final_value = int(sell_value * bonus_multiplier)
+                final_value = int(sell_value * bonus_multiplier)
             
-            attack = "{:+}".format(countryball.attack_bonus)
-            health = "{:+}".format(countryball.health_bonus)
-            special_text = f" ({countryball.specialcard.name})" if countryball.specialcard else ""
+                attack = "{:+}".format(countryball.attack_bonus)
+                health = "{:+}".format(countryball.health_bonus)
+                special_text = f" ({countryball.specialcard.name})" if countryball.specialcard else ""
             
-            embed = discord.Embed(
-                title="Confirm Quicksell",
-                description=(
-                    f"Are you sure you want to sell **#{countryball.pk:0X} {ball.country}{special_text}** "
-                    f"({attack}%/{health}%) for **{final_value:,}** coins?"
-                ),
-                color=discord.Color.orange()
-            )
-            
-            view = ConfirmView(interaction.user)
-            await interaction.response.send_message(embed=embed, view=view)
+                embed = discord.Embed(
+                    title="Confirm Quicksell",
+                    description=(
+                        f"Are you sure you want to sell **#{countryball.pk:0X} {ball.country}{special_text}** "
+                        f"({attack}%/{health}%) for **{final_value:,}** coins?"
+                    ),
+                    color=discord.Color.orange()
+                )
             
-            await view.wait()
+                view = ConfirmView(interaction.user)
+                await interaction.response.send_message(embed=embed, view=view)
             
-            if view.value is None:
-                await countryball.unlock()
-                embed.description = "Quicksell timed out."
-                embed.color = discord.Color.greyple()
-                await interaction.edit_original_response(embed=embed, view=None)
-                return
+                await view.wait()
             
-            if not view.value:
-                await countryball.unlock()
-                embed.description = "Quicksell cancelled."
-                embed.color = discord.Color.red()
-                await interaction.edit_original_response(embed=embed, view=None)
-                return
+                if view.value is None:
+                    await countryball.unlock()
+                    embed.description = "Quicksell timed out."
+                    embed.color = discord.Color.greyple()
+                    await interaction.edit_original_response(embed=embed, view=None)
+                    return
             
-            async with in_transaction():
-                player = await Player.get(discord_id=interaction.user.id)
-                await countryball.refresh_from_db()
-                
-                if countryball.player_id != player.pk or countryball.deleted:
+                if not view.value:
                     await countryball.unlock()
-                    embed.description = f"You no longer own this {settings.collectible_name}!"
+                    embed.description = "Quicksell cancelled."
                     embed.color = discord.Color.red()
                     await interaction.edit_original_response(embed=embed, view=None)
                     return
+            
+                async with in_transaction() as connection:
+                    await countryball.refresh_from_db()
                 
-                countryball.deleted = True
-                await countryball.save(update_fields=["deleted"])
-                await countryball.unlock()
+                    if countryball.player_id != owner_id or countryball.deleted:
+                        await countryball.unlock()
+                        embed.description = f"You no longer own this {settings.collectible_name}!"
+                        embed.color = discord.Color.red()
+                        await interaction.edit_original_response(embed=embed, view=None)
+                        return
+                
+                    countryball.deleted = True
+                    await countryball.save(update_fields=["deleted"])
+                    await countryball.unlock()
                 
-                player.coins += final_value
-                await player.save(update_fields=["coins"])
+                    balance = await _add_coins(interaction.user.id, final_value, connection)
             
-            embed.title = "Quicksell Complete!"
-            embed.description = (
-                f"You sold **#{countryball.pk:0X} {ball.country}{special_text}** for **{final_value:,}** coins!\n"
-                f"New balance: **{player.coins:,}** coins"
-            )
-            embed.color = discord.Color.green()
-            await interaction.edit_original_response(embed=embed, view=None)
-        except Exception:
-            try:
-                await countryball.unlock()
+                embed.title = "Quicksell Complete!"
+                embed.description = (
+                    f"You sold **#{countryball.pk:0X} {ball.country}{special_text}** for **{final_value:,}** coins!\n"
+                    f"New balance: **{balance:,}** coins"
+                )
+                embed.color = discord.Color.green()
+                await interaction.edit_original_response(embed=embed, view=None)
             except Exception:
-                pass
-            raise
-        finally:
-            _active_operations.discard(interaction.user.id)
+                try:
+                    await countryball.unlock()
+                except Exception:
+                    pass
+                raise
 
     @app_commands.command()
     async def bulk_sell(
@@ -504,7 +709,8 @@ class Coins(commands.GroupCog, group_name="coins"):
         filter: FilteringChoices
             Filter the results to a specific filter
         """
-        if interaction.user.id in _active_operations:
+        lock = _get_user_lock(interaction.user.id)
+        if lock.locked():
             await interaction.response.send_message("You have another operation in progress!", ephemeral=True)
             return
         
@@ -518,20 +724,23 @@ class Coins(commands.GroupCog, group_name="coins"):
             query = query.filter(ball=countryball)
         if special:
             query = query.filter(special=special)
+        # pages are fetched with OFFSET, the order must be stable, ties included
         if sort:
-            query = sort_balls(sort, query)
+            query = sort_balls(sort, query, tiebreaker="id")
+        else:
+            query = query.order_by("id")
         if filter:
             query = filter_balls(filter, query, interaction.guild_id)
         
-        balls = cast(list[int], await query.values_list("id", flat=True))
+        count = await query.count()
         
-        if not balls:
+        if not count:
             await interaction.followup.send(
                 f"No {settings.plural_collectible_name} found.", ephemeral=True
             )
             return
         
-        view = BulkSellSelector(interaction, balls)
+        view = BulkSellSelector(interaction, query, count)
         await view.start(
             content=f"Select the {settings.plural_collectible_name} you want to sell, "
             "note that the display will wipe on pagination however "
@@ -543,111 +752,99 @@ class Coins(commands.GroupCog, group_name="coins"):
         if not view.confirmed or not view.balls_selected:
             return
         
-        if interaction.user.id in _active_operations:
+        if lock.locked():
             await interaction.edit_original_response(
                 content="You have another operation in progress!", embed=None, view=None
             )
             return
         
-        _active_operations.add(interaction.user.id)
-        locked_balls = []
-        try:
-            valid_balls = await BallInstance.filter(
-                id__in=list(view.balls_selected),
-                player=player,
-                deleted=False,
-                favorite=False,
-                locked__isnull=True
-            ).prefetch_related("ball", "special")
+        async with lock:
+            selected_ids = list(view.balls_selected)
+            # instances are locked in one UPDATE, the timestamp identifies the rows we locked
+            lock_time = timezone.now()
+            try:
+                await BallInstance.filter(
+                    id__in=selected_ids,
+                    player=player,
+                    deleted=False,
+                    favorite=False,
+                    locked__isnull=True
+                ).update(locked=lock_time)
+                # only the IDs are needed, values are summed in SQL
+                locked_ids = await BallInstance.filter(
+                    id__in=selected_ids, locked=lock_time
+                ).values_list("id", flat=True)
+            
+                if not locked_ids:
+                    await interaction.edit_original_response(
+                        content=None,
+                        embed=discord.Embed(
+                            title="Bulk Sell Failed",
+                            description="None of the selected NBAs could be sold. They may have been traded or locked.",
+                            color=discord.Color.red()
+                        ),
+                        view=None
+                    )
+                    return
             
-            for inst in valid_balls:
-                await inst.lock_for_trade()
-                locked_balls.append(inst)
+                total_value = await _quicksell_total(locked_ids)
             
-            if not locked_balls:
-                await interaction.edit_original_response(
-                    content=None,
-                    embed=discord.Embed(
-                        title="Bulk Sell Failed",
-                        description="None of the selected NBAs could be sold. They may have been traded or locked.",
-                        color=discord.Color.red()
+                confirm_embed = discord.Embed(
+                    title="Confirm Bulk Sell",
+                    description=(
+                        f"Are you sure you want to sell **{len(locked_ids)}** "
+                        f"{settings.plural_collectible_name} for **{total_value:,}** coins?\n\n"
+                        f"This action cannot be undone!"
                     ),
-                    view=None
+                    color=discord.Color.orange()
                 )
-                return
-            
-            total_value = 0
-            for inst in locked_balls:
-                value = inst.countryball.quicksell_value
-                if inst.specialcard:
-                    value = int(value * 1.5)
-                total_value += value
             
-            confirm_embed = discord.Embed(
-                title="Confirm Bulk Sell",
-                description=(
-                    f"Are you sure you want to sell **{len(locked_balls)}** "
-                    f"{settings.plural_collectible_name} for **{total_value:,}** coins?\n\n"
-                    f"This action cannot be undone!"
-                ),
-                color=discord.Color.orange()
-            )
+                confirm_view = ConfirmView(interaction.user)
+                await interaction.edit_original_response(content=None, embed=confirm_embed, view=confirm_view)
             
-            confirm_view = ConfirmView(interaction.user)
-            await interaction.edit_original_response(content=None, embed=confirm_embed, view=confirm_view)
+                await confirm_view.wait()
             
-            await confirm_view.wait()
+                if confirm_view.value is None or not confirm_view.value:
+                    await _unlock_instances(selected_ids, lock_time)
+                    confirm_embed.title = "Bulk Sell Cancelled"
+                    confirm_embed.description = "You cancelled the bulk sell."
+                    confirm_embed.color = discord.Color.red()
+                    await interaction.edit_original_response(embed=confirm_embed, view=None)
+                    return
             
-            if confirm_view.value is None or not confirm_view.value:
-                for inst in locked_balls:
-                    await inst.unlock()
-                confirm_embed.title = "Bulk Sell Cancelled"
-                confirm_embed.description = "You cancelled the bulk sell."
-                confirm_embed.color = discord.Color.red()
-                await interaction.edit_original_response(embed=confirm_embed, view=None)
-                return
             
-            sold_count = 0
-            actual_value = 0
+                async with in_transaction() as connection:
+                    # only the instances still owned and not deleted are sold, the UPDATE
+                    # reports which ones so the transaction is three statements long
+                    rows = await connection.execute_query_dict(
+                        "UPDATE ballinstance SET deleted = TRUE "
+                        "WHERE id = ANY($1) AND player_id = $2 AND NOT deleted RETURNING id",
+                        [list(locked_ids), player.pk],
+                    )
+                    sold_ids = [row["id"] for row in rows]
+                    sold_count = len(sold_ids)
+                    actual_value = await _quicksell_total(sold_ids, connection)
+                    balance = await _add_coins(player.discord_id, actual_value, connection)
             
-            async with in_transaction():
-                await player.refresh_from_db()
-                
-                for inst in locked_balls:
-                    await inst.refresh_from_db()
-                    if inst.player_id == player.pk and not inst.deleted:
-                        value = inst.countryball.quicksell_value
-                        if inst.specialcard:
-                            value = int(value * 1.5)
-                        actual_value += value
-                        inst.deleted = True
-                        await inst.save(update_fields=["deleted"])
-                        sold_count += 1
-                    await inst.unlock()
-                
-                player.coins += actual_value
-                await player.save(update_fields=["coins"])
+                await _unlock_instances(selected_ids, lock_time)
             
-            skipped = len(locked_balls) - sold_count
-            skip_text = f"\n({skipped} skipped)" if skipped > 0 else ""
-            embed = discord.Embed(
-                title="Bulk Quicksell Complete!",
-                description=(
-                    f"You sold **{sold_count}** {settings.plural_collectible_name} for **{actual_value:,}** coins!{skip_text}\n"
-                    f"New balance: **{player.coins:,}** coins"
-                ),
-                color=discord.Color.green()
-            )
-            await interaction.edit_original_response(embed=embed, view=None)
-        except Exception:
-            for inst in locked_balls:
+                skipped = len(locked_ids) - sold_count
+                skip_text = f"\n({skipped} skipped)" if skipped > 0 else ""
+                embed = discord.Embed(
+                    title="Bulk Quicksell Complete!",
+                    description=(
+                        f"You sold **{sold_count}** {settings.plural_collectible_name} for **{actual_value:,}** coins!{skip_text}\n"
+                        f"New balance: **{balance:,}** coins"
+                    ),
+                    color=discord.Color.green()
+                )
+                await interaction.edit_original_response(embed=embed, view=None)
+            except Exception:
                 try:
-                    await inst.unlock()
+                    await _unlock_instances(selected_ids, lock_time)
                 except Exception:
                     pass
-            raise
-        finally:
-            _active_operations.discard(interaction.user.id)
+                raise
 
 
 class Packs(commands.GroupCog, group_name="pack"):
@@ -670,7 +867,7 @@ class Packs(commands.GroupCog, group_name="pack"):
         
         embed = discord.Embed(
             title="Available Packs",
-            description=f"Here are the packs you can buy with coins:",
+            description="Here are the packs you can buy with coins:",
             color=discord.Color.blue()
         )
         
@@ -715,12 +912,12 @@ class Packs(commands.GroupCog, group_name="pack"):
             await interaction.response.send_message("You can only buy up to 100 packs at a time!", ephemeral=True)
             return
         
-        if interaction.user.id in _active_operations:
+        lock = _get_user_lock(interaction.user.id)
+        if lock.locked():
             await interaction.response.send_message("You have another operation in progress!", ephemeral=True)
             return
         
-        _active_operations.add(interaction.user.id)
-        try:
+        async with lock:
             total_cost = pack.price * amount
             
             player, _ = await Player.get_or_create(discord_id=interaction.user.id)
@@ -760,45 +957,35 @@ class Packs(commands.GroupCog, group_name="pack"):
                 await interaction.edit_original_response(embed=embed, view=None)
                 return
             
-            async with in_transaction():
-                await player.refresh_from_db()
-                
-                if player.coins < total_cost:
+            async with in_transaction() as connection:
+                balance = await _add_coins(player.discord_id, -total_cost, connection)
+                if balance is None:
                     embed.description = "You no longer have enough coins!"
                     embed.color = discord.Color.red()
                     await interaction.edit_original_response(embed=embed, view=None)
                     return
                 
-                player.coins -= total_cost
-                await player.save(update_fields=["coins"])
-                
-                player_pack, created = await PlayerPack.get_or_create(
-                    player=player,
-                    pack=pack,
-                    defaults={"quantity": 0}
-                )
-                player_pack.quantity += amount
-                await player_pack.save(update_fields=["quantity"])
+                quantity = await _add_packs(player.pk, pack.pk, amount, connection)
             
             embed.title = "Purchase Complete!"
             embed.description = (
                 f"You bought **{amount}x {emoji}{pack.name}**!\n"
                 f"Coins spent: **{total_cost:,}**\n"
-                f"New balance: **{player.coins:,}** coins\n"
-                f"You now have **{player_pack.quantity}** of this pack."
+                f"New balance: **{balance:,}** coins\n"
+                f"You now have **{quantity}** of this pack."
             )
             embed.color = discord.Color.green()
             await interaction.edit_original_response(embed=embed, view=None)
-        finally:
-            _active_operations.discard(interaction.user.id)
 
     @app_commands.command()
     async def inventory(self, interaction: discord.Interaction):
         """
         View your owned packs.
         """
-        player, _ = await Player.get_or_create(discord_id=interaction.user.id)
-        player_packs = await PlayerPack.filter(player=player, quantity__gt=0).prefetch_related("pack")
+        player_id = await _get_player_id(interaction.user.id)
+        player_packs = await PlayerPack.filter(
+            player_id=player_id, quantity__gt=0
+        ).select_related("pack")
         
         if not player_packs:
             await interaction.response.send_message(
@@ -809,14 +996,14 @@ class Packs(commands.GroupCog, group_name="pack"):
         
         embed = discord.Embed(
             title="Your Packs",
-            description="",
+            description="".join(
+                f"{pp.pack.emoji + ' ' if pp.pack.emoji else ''}"
+                f"**{pp.pack.name}**: {pp.quantity}\n"
+                for pp in player_packs
+            ),
             color=discord.Color.gold()
         )
         
-        for pp in player_packs:
-            emoji = pp.pack.emoji + " " if pp.pack.emoji else ""
-            embed.description += f"{emoji}**{pp.pack.name}**: {pp.quantity}\n"
-        
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command()
@@ -858,48 +1045,33 @@ class Packs(commands.GroupCog, group_name="pack"):
             )
             return
         
-        if interaction.user.id in _active_operations:
+        lock = _get_user_lock(interaction.user.id)
+        if lock.locked():
             await interaction.response.send_message("You have another operation in progress!", ephemeral=True)
             return
         
-        await pack.fetch_related("pack", "player")
         the_pack = pack.pack
         
-        _active_operations.add(interaction.user.id)
-        try:
-            async with in_transaction():
-                await pack.refresh_from_db()
-                
-                if pack.quantity < amount:
+        async with lock:
+            # resolved outside the transaction so that a rollback can't leave a cached ID behind
+            recipient_id = await _get_player_id(user.id)
+            
+            async with in_transaction() as connection:
+                remaining = await _take_packs(pack.pk, amount, connection)
+                if remaining is None:
                     await interaction.response.send_message(
-                        f"You no longer have enough packs!",
+                        "You no longer have enough packs!",
                         ephemeral=True
                     )
                     return
                 
-                pack.quantity -= amount
-                await pack.save(update_fields=["quantity"])
-                
-                recipient, _ = await Player.get_or_create(discord_id=user.id)
-                
-                recipient_pack = await PlayerPack.filter(player=recipient, pack=the_pack).first()
-                if recipient_pack:
-                    recipient_pack.quantity += amount
-                    await recipient_pack.save(update_fields=["quantity"])
-                else:
-                    await PlayerPack.create(
-                        player=recipient,
-                        pack=the_pack,
-                        quantity=amount
-                    )
+                await _add_packs(recipient_id, the_pack.pk, amount, connection)
             
             emoji = the_pack.emoji + " " if the_pack.emoji else ""
             await interaction.response.send_message(
                 f"{interaction.user.mention} gave **{amount}x {emoji}{the_pack.name}** to {user.mention}!\n"
-                f"You now have **{pack.quantity}** of this pack."
+                f"You now have **{remaining}** of this pack."
             )
-        finally:
-            _active_operations.discard(interaction.user.id)
 
     @app_commands.command()
     async def open(
@@ -929,7 +1101,14 @@ class Packs(commands.GroupCog, group_name="pack"):
             )
             return
         
-        if interaction.user.id in _active_operations:
+        if pack.quantity < amount:
+            await interaction.response.send_message(
+                f"You only have **{pack.quantity}** of this pack!", ephemeral=True
+            )
+            return
+        
+        lock = _get_user_lock(interaction.user.id)
+        if lock.locked():
             await interaction.response.send_message(
                 "You have another pack operation in progress! Please wait.",
                 ephemeral=True
@@ -938,136 +1117,116 @@ class Packs(commands.GroupCog, group_name="pack"):
         
         await interaction.response.defer()
         
-        _active_operations.add(interaction.user.id)
-        try:
-            await pack.fetch_related("pack", "pack__special", "player")
+        async with lock:
             the_pack = pack.pack
-            player = pack.player
+            player_id = pack.player_id
             
-            async with in_transaction():
-                await pack.refresh_from_db()
-                
-                if pack.quantity < amount:
+            special_to_use = the_pack.special if the_pack.special_id else None
+            today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            
+            # both reads are independent, run them concurrently before opening the transaction
+            opens_today, special_balls = await asyncio.gather(
+                _count_daily_opens(player_id, the_pack, today_start),
+                _get_special_ball_ids(special_to_use if the_pack.special_only else None),
+            )
+            
+            if the_pack.daily_limit > 0:
+                remaining = the_pack.daily_limit - opens_today
+                if remaining <= 0:
+                    hours_until_reset = 24 - timezone.now().hour
                     await interaction.followup.send(
-                        f"You only have **{pack.quantity}** of this pack!"
+                        f"You've reached the daily limit for opening **{the_pack.name}**!\n"
+                        f"Your limit will reset in about {hours_until_reset} hours."
                     )
                     return
                 
-                if the_pack.daily_limit > 0:
-                    today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                    opens_today = await PackOpenHistory.filter(
-                        player=player,
-                        pack=the_pack,
-                        opened_at__gte=today_start
-                    ).count()
-                    
-                    remaining = the_pack.daily_limit - opens_today
-                    if remaining <= 0:
-                        hours_until_reset = 24 - timezone.now().hour
-                        await interaction.followup.send(
-                            f"You've reached the daily limit for opening **{the_pack.name}**!\n"
-                            f"Your limit will reset in about {hours_until_reset} hours."
-                        )
-                        return
-                    
-                    if amount > remaining:
-                        await interaction.followup.send(
-                            f"You can only open **{remaining}** more of this pack today!"
-                        )
-                        return
-                
-                pack.quantity -= amount
-                await pack.save(update_fields=["quantity"])
-                
-                special_to_use = None
-                if the_pack.special_id:
-                    special_to_use = the_pack.special
-                
-                if the_pack.special_only and special_to_use:
-                    special_balls = await BallInstance.filter(
-                        special=special_to_use,
-                        deleted=False
-                    ).prefetch_related("ball").distinct().values_list("ball_id", flat=True)
-                    
-                    available_balls = await Ball.filter(
-                        enabled=True,
-                        id__in=list(special_balls),
-                        rarity__gte=the_pack.min_rarity,
-                        rarity__lte=the_pack.max_rarity
-                    ).all()
-                    
-                    if not available_balls:
-                        available_balls = await Ball.filter(
-                            enabled=True,
-                            rarity__gte=the_pack.min_rarity,
-                            rarity__lte=the_pack.max_rarity
-                        ).all()
-                else:
-                    available_balls = await Ball.filter(
-                        enabled=True,
-                        rarity__gte=the_pack.min_rarity,
-                        rarity__lte=the_pack.max_rarity
-                    ).all()
-                
-                if not available_balls:
-                    pack.quantity += amount
-                    await pack.save(update_fields=["quantity"])
+                if amount > remaining:
                     await interaction.followup.send(
-                        f"No {settings.plural_collectible_name} available in this pack's rarity range!"
+                        f"You can only open **{remaining}** more of this pack today!"
                     )
                     return
+            
+            # the enabled balls are all loaded in the bot's cache, no need to query them
+            available_balls = [
+                ball
+                for ball in balls.values()
+                if ball.enabled and the_pack.min_rarity <= ball.rarity <= the_pack.max_rarity
+            ]
+            
+            if special_balls:
+                special_pool = [ball for ball in available_balls if ball.pk in special_balls]
+                if special_pool:
+                    available_balls = special_pool
+            
+            if not available_balls:
+                await interaction.followup.send(
+                    f"No {settings.plural_collectible_name} available in this pack's rarity range!"
+                )
+                return
+            
+            async with in_transaction() as connection:
+                # the quantity check and the decrement are a single atomic UPDATE
+                if await _take_packs(pack.pk, amount, connection) is None:
+                    await interaction.followup.send("You no longer have enough of this pack!")
+                    return
                 
-                total_rarity = sum(b.rarity for b in available_balls)
+                # balls of the same rarity are equally likely, so a tier weighted by its total
+                # rarity is drawn first, then a ball uniformly within it
+                tiers: dict[float, list[Ball]] = {}
+                for ball in available_balls:
+                    tiers.setdefault(ball.rarity, []).append(ball)
                 
-                results = []
+                card_count = amount * the_pack.cards_count
+                # draw every bonus at once, uniform over the same inclusive range as randint
+                attack_bonuses = random.choices(
+                    range(-settings.max_attack_bonus, settings.max_attack_bonus + 1), k=card_count
+                )
+                health_bonuses = random.choices(
+                    range(-settings.max_health_bonus, settings.max_health_bonus + 1), k=card_count
+                )
                 
-                for _ in range(amount):
-                    pack_cards = []
-                    for _ in range(the_pack.cards_count):
-                        roll = random.uniform(0, total_rarity)
-                        cumulative = 0
-                        selected_ball = available_balls[0]
-                        
-                        for ball in available_balls:
-                            cumulative += ball.rarity
-                            if roll <= cumulative:
-                                selected_ball = ball
-                                break
-                        
-                        attack_bonus = random.randint(-settings.max_attack_bonus, settings.max_attack_bonus)
-                        health_bonus = random.randint(-settings.max_health_bonus, settings.max_health_bonus)
-                        
-                        instance = await BallInstance.create(
-                            ball=selected_ball,
-                            player=player,
-                            attack_bonus=attack_bonus,
-                            health_bonus=health_bonus,
-                            special=special_to_use,
-                            server_id=interaction.guild_id if interaction.guild else None,
-                        )
-                        pack_cards.append(instance)
-                        results.append(instance)
-                    
-                    await PackOpenHistory.create(
-                        player=player,
-                        pack=the_pack,
-                        ball_received=pack_cards[0] if pack_cards else None
+                rolled_tiers = random.choices(
+                    list(tiers.values()),
+                    weights=[rarity * len(tier) for rarity, tier in tiers.items()],
+                    k=card_count,
+                )
+                rolls: list[tuple[Ball, int, int]] = [
+                    (random.choice(tier), attack_bonus, health_bonus)
+                    for tier, attack_bonus, health_bonus in zip(
+                        rolled_tiers, attack_bonuses, health_bonuses
                     )
+                ]
+                
+                results = await _create_instances(
+                    connection,
+                    rolls,
+                    player_id=player_id,
+                    special=special_to_use,
+                    server_id=interaction.guild_id if interaction.guild else None,
+                )
+                await PackOpenHistory.bulk_create(
+                    [
+                        PackOpenHistory(
+                            player_id=player_id,
+                            pack=the_pack,
+                            cards_received=the_pack.cards_count,
+                        )
+                        for _ in range(amount)
+                    ]
+                )
             
             emoji = the_pack.emoji + " " if the_pack.emoji else ""
             
             if len(results) == 1:
                 inst = results[0]
                 ball = inst.countryball
-                attack = "{:+}".format(inst.attack_bonus)
-                health = "{:+}".format(inst.health_bonus)
                 special_text = f" ({inst.specialcard.name})" if inst.specialcard else ""
                 
                 embed = discord.Embed(
                     title=f"{emoji}{the_pack.name}",
                     description=(
                         f"{interaction.user.mention} You packed **{ball.country}**!{special_text}\n"
-                        f"(#{inst.pk:0X}, {attack}%/{health}%)"
+                        f"(#{inst.pk:0X}, {inst.attack_bonus:+d}%/{inst.health_bonus:+d}%)"
                     ),
                     color=discord.Color.gold()
                 )
@@ -1076,22 +1235,26 @@ class Packs(commands.GroupCog, group_name="pack"):
                 if ball_emoji:
                     embed.set_thumbnail(url=ball_emoji.url)
             else:
-                description = f"{interaction.user.mention} You opened **{amount}x {the_pack.name}**!\n\n"
+                lines = [
+                    f"{interaction.user.mention} You opened **{amount}x {the_pack.name}**!\n\n"
+                ]
+                # the same ball is often rolled several times, render each emoji once
+                emojis: dict[int, str] = {}
+                for ball in {inst.countryball for inst in results}:
+                    ball_emoji = self.bot.get_emoji(ball.emoji_id)
+                    emojis[ball.pk] = str(ball_emoji) + " " if ball_emoji else ""
                 for inst in results:
                     ball = inst.countryball
-                    attack = "{:+}".format(inst.attack_bonus)
-                    health = "{:+}".format(inst.health_bonus)
                     special_text = f" ({inst.specialcard.name})" if inst.specialcard else ""
-                    ball_emoji = self.bot.get_emoji(ball.emoji_id)
-                    emoji_str = str(ball_emoji) + " " if ball_emoji else ""
-                    description += f"{emoji_str}**{ball.country}**{special_text} (#{inst.pk:0X}, {attack}%/{health}%)\n"
+                    lines.append(
+                        f"{emojis[ball.pk]}**{ball.country}**{special_text} "
+                        f"(#{inst.pk:0X}, {inst.attack_bonus:+d}%/{inst.health_bonus:+d}%)\n"
+                    )
                 
                 embed = discord.Embed(
                     title=f"{emoji}{the_pack.name} Results",
-                    description=description,
+                    description="".join(lines),
                     color=discord.Color.gold()
                 )
             
             await interaction.followup.send(embed=embed)
-        finally:
-            _active_operations.discard(interaction.user.id)
@@ -59,6 +59,9 @@ class Settings:
         List of roles that have full access to the /admin command
     admin_role_ids: list[int]
         List of roles that have partial access to the /admin command (only blacklist and guilds)
+    betting_channels: list[tuple[int, int]]
+        List of (guild ID, channel ID) pairs where the /bet commands can be used, empty means
+        no restriction
     packages: list[str]
         List of packages the bot will load upon startup
     spawn_chance_range: tuple[int, int] = (40, 55)
@@ -104,6 +107,8 @@ class Settings:
 
     log_channel: int | None = None
 
+    betting_channels: list[tuple[int, int]] = field(default_factory=list)
+
     team_owners: bool = False
     co_owners: list[int] = field(default_factory=list)
 
@@ -172,6 +177,11 @@ def read_settings(path: "Path"):
 
     settings.log_channel = content.get("log-channel", None)
 
+    if (betting_channels := content.get("betting-channels")) is not None:
+        settings.betting_channels = [
+            (int(guild_id), int(channel_id)) for guild_id, channel_id in betting_channels
+        ]
+
     settings.prometheus_enabled = content["prometheus"]["enabled"]
     settings.prometheus_host = content["prometheus"]["host"]
     settings.prometheus_port = content["prometheus"]["port"]
@@ -305,6 +315,12 @@ admin-command:
 # log channel for moderation actions
 log-channel:
 
+# list of [guild ID, channel ID] pairs where the /bet commands can be used, empty means no
+# restriction
+# betting-channels:
+#   - [guild ID, channel ID]
+betting-channels:
+
 # manage bot ownership
 owners:
   # if enabled and the application is under a team, all team members will be considered as owners